@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# A script benchmarking the wakeups and cpu time of the scheduler under every
+# mode of the adaptive sampling policy, running synthetic tasks which burn
+# the cpu time the real ones have been measured to take
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+from util.scheduler import Scheduler
+from util.adaptive import Policy
+
+parser = argparse.ArgumentParser(prog='adaptive')
+
+parser.add_argument('--seconds', type=int, default=120, help='the simulated secs to run each mode for')
+parser.add_argument('--scale', type=float, default=0.1, help='the factor to shrink intervals and costs by')
+
+opts = parser.parse_args()
+
+# The default interval in secs and the measured cost in usecs of every task
+TASKS = {
+  'uptime': (1, 10),
+  'cpu': (1, 200),
+  'memory': (1, 50),
+  'gpu': (2, 5000),
+  'disk': (30, 400),
+  'io': (1, 100),
+  'network': (1, 150),
+  'actions': (1, 50),
+  'processes': (2, 17600),
+  'publish': (1, 600)
+}
+
+EXPENSIVE = ['gpu', 'disk', 'processes']
+
+# The idle secs, power and lock state forced in each mode
+MODES = {
+  'active': (0, True, False),
+  'battery': (0, False, False),
+  'idle': (600, True, False),
+  'idle+battery': (600, False, False),
+  'locked': (600, True, True)
+}
+
+class Forced(Policy):
+  # A policy reading the forced state instead of the system's
+  def __init__ (self, scheduler, idle, ac, locked):
+    super().__init__(scheduler)
+    self.forced = (idle, ac, locked)
+
+  def read_idle (self, now):
+    return self.forced[0]
+
+  def read_power (self):
+    return self.forced[1]
+
+  def read_locked (self, quiet, scan):
+    return self.forced[2]
+
+# Returns a callback burning the given usecs of cpu time
+def burn (usecs):
+  secs = usecs / 1000000 * opts.scale
+
+  def callback ():
+    end = time.perf_counter() + secs
+
+    while time.perf_counter() < end:
+      pass
+
+  return callback
+
+# Runs the tasks under the given forced state, returning wakeups and cpu time
+def run (idle, ac, locked):
+  scheduler = Scheduler()
+
+  intervals = {name: interval * opts.scale for name, (interval, cost) in TASKS.items()}
+
+  for name, (interval, cost) in TASKS.items():
+    scheduler.every(name, intervals[name], burn(cost), priority=1 if name == 'publish' else 0)
+
+  settings = {
+    'enabled': True,
+    'check': 5 * opts.scale,
+    'idle': 300,
+    'suspend': True,
+    'stretch': {'idle': 4, 'locked': 8, 'battery': 2}
+  }
+
+  policy = Forced(scheduler, idle, ac, locked)
+
+  scheduler.every('policy', settings['check'], policy.tick, priority=-1)
+  policy.configure(intervals, EXPENSIVE, settings)
+
+  # Every task is first due right away, so stop from outside after the run time
+  timer = threading.Timer(opts.seconds * opts.scale, scheduler.stop)
+
+  start = time.process_time()
+  timer.start()
+  scheduler.run()
+
+  # Take the savings of the last stretch into account
+  policy.account(time.monotonic())
+
+  return scheduler.wakeups, time.process_time() - start, policy.skipped
+
+results = {}
+
+print(f"{'mode':<16}{'wakeups/min':>12}{'cpu %':>8}{'skipped':>10}{'cpu saved':>11}{'wakeups saved':>15}")
+
+for mode, forced in MODES.items():
+  wakeups, cpu, skipped = run(*forced)
+
+  # Report per simulated minute, turning the scaled time back
+  minutes = opts.seconds / 60
+  rate = wakeups / minutes
+  load = cpu / (opts.seconds * opts.scale) * 100
+
+  results[mode] = (rate, load)
+
+  base_rate, base_load = results['active']
+
+  print(f"{mode:<16}{rate:>12.1f}{load:>8.3f}{skipped:>10.0f}"
+    f"{(1 - load / base_load) * 100:>10.1f}%{(1 - rate / base_rate) * 100:>14.1f}%")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# A script benchmarking the per core cpu sampling against simulated
+# stat and cpufreq files of a growing number of cores
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import harness
+from util import procfs
+from util import cores
+
+parser = argparse.ArgumentParser(prog='cores')
+
+parser.add_argument('--iterations', type=int, default=1000, help='how many times to run each case')
+parser.add_argument('--counts', type=int, nargs='+', default=[8, 64, 256], help='the simulated core counts')
+
+opts = parser.parse_args()
+
+# Writes a stat file of the given cores, advancing their times by the given tick
+def write_stat (path, count, tick):
+  lines = [f'cpu  {tick * count} 0 {tick} {tick * 9 * count} 0 0 0 0 0 0']
+
+  for core in range(count):
+    lines.append(f'cpu{core} {tick + core} {core} {tick} {tick * 9} 3 0 {core} 0 0 0')
+
+  lines.append('intr 1 0 0 0')
+  lines.append('ctxt 123456')
+
+  with open(path, 'w') as stat_file:
+    stat_file.write('\n'.join(lines) + '\n')
+
+# Writes a cpufreq file for every core, returning their paths
+def write_clocks (directory, count):
+  paths = []
+
+  for core in range(count):
+    path = os.path.join(directory, f'cpu{core}_cur_freq')
+
+    with open(path, 'w') as clock_file:
+      clock_file.write(f'{2000000 + core * 1000}\n')
+
+    paths.append(path)
+
+  return paths
+
+temp_dir = tempfile.mkdtemp(prefix='walle-cores-')
+
+modes = [('arrays', False)]
+
+if cores.numpy is not None:
+  modes.append(('numpy', True))
+else:
+  print('numpy is not installed, measuring the plain arrays only')
+
+print(f"{'case':<20}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'us/core':>10}{'peak B':>10}")
+
+try:
+  for count in opts.counts:
+    stat_path = os.path.join(temp_dir, f'stat{count}')
+    write_stat(stat_path, count, 100)
+
+    stat = procfs.File(stat_path, 4096)
+    clocks = procfs.Files()
+    clock_paths = write_clocks(temp_dir, count)
+
+    cases = {}
+
+    for mode, vectorized in modes:
+      sampler = cores.Cores(vectorized)
+      cases[f'{mode}.{count}'] = lambda sampler=sampler: sampler.update(*stat.read())
+
+    cases[f'clocks.{count}'] = lambda: [procfs.parse_int(*clock.read()) for clock in clocks.get(clock_paths)]
+
+    for name, callback in cases.items():
+      result = harness.measure(callback, opts.iterations)
+
+      print(f"{name:<20}{result['p50']:>10.1f}{result['p95']:>10.1f}{result['p99']:>10.1f}"
+        f"{result['p50'] / count:>10.2f}{result['peak']:>10}")
+
+    stat.close()
+finally:
+  shutil.rmtree(temp_dir)
@@ -0,0 +1,80 @@
+# A module exporting fake third-party backends, so the benchmarks can run
+# on machines without a graphics card, sensors, an X server or any of the
+# python dependencies installed
+
+import sys
+import types
+import importlib.machinery
+
+# Builds a module with the given name and attributes
+def module (name, **attrs):
+  fake = types.ModuleType(name)
+
+  # Let the registry find the fake when checking for requirements
+  fake.__spec__ = importlib.machinery.ModuleSpec(name, None)
+
+  for key, value in attrs.items():
+    setattr(fake, key, value)
+
+  return fake
+
+class GPU:
+  def __init__ (self, index):
+    self.id = index
+    self.load = 0.42
+    self.memoryUsed = 1024.0
+    self.temperature = 55.0
+
+class Listener:
+  def __init__ (self, **callbacks):
+    self.callbacks = callbacks
+
+  def start (self):
+    pass
+
+  def stop (self):
+    pass
+
+class Controller:
+  position = (0, 0)
+
+class Monitor:
+  def __init__ (self, name, x, y, width, height, is_primary):
+    self.name = name
+    self.x = x
+    self.y = y
+    self.width = width
+    self.height = height
+    self.is_primary = is_primary
+
+class Completed:
+  stdout = '8.8.8.8 via 192.168.1.1 dev eth0 src 192.168.1.2 uid 1000\n'
+  stderr = ''
+  returncode = 0
+
+# Returns a fake of the subprocess module answering any command instantly
+def subprocess ():
+  import subprocess as real
+
+  return module('subprocess', run=lambda *args, **kwargs: Completed(), PIPE=real.PIPE)
+
+# Installs the fake modules, given how many graphics cards to pretend
+def install (gpus=1):
+  sys.modules['psutil'] = module('psutil', cpu_count=lambda logical=True: 16 if logical else 8)
+  sys.modules['GPUtil'] = module('GPUtil', getGPUs=lambda: [GPU(i) for i in range(gpus)])
+
+  pynput = module('pynput')
+  pynput.keyboard = module('pynput.keyboard', Listener=Listener)
+  pynput.mouse = module('pynput.mouse', Listener=Listener, Controller=Controller)
+
+  sys.modules['pynput'] = pynput
+  sys.modules['pynput.keyboard'] = pynput.keyboard
+  sys.modules['pynput.mouse'] = pynput.mouse
+
+  sys.modules['screeninfo'] = module('screeninfo',
+    get_monitors=lambda: [Monitor('DP-1', 0, 0, 2560, 1440, True)],
+    ScreenInfoError=type('ScreenInfoError', (Exception,), {}))
+
+  # Pretend the nvidia driver has registered the graphics cards
+  from util import topology
+  topology.count_gpus = lambda: gpus
@@ -0,0 +1,100 @@
+# A module exporting the measuring and baseline comparison of benchmarks
+
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+# Returns the number of read and write syscalls the process has made so far
+def syscalls ():
+  counts = {}
+
+  with open('/proc/self/io') as io_file:
+    for line in io_file:
+      key, value = line.split(':')
+      counts[key] = int(value)
+
+  return counts['syscr'] + counts['syscw']
+
+# Returns the value at the given percentile of the sorted samples
+def percentile (samples, rank):
+  index = min(len(samples) - 1, int(round(rank / 100 * (len(samples) - 1))))
+
+  return samples[index]
+
+# Runs the callback the given times measuring latency, allocations and syscalls
+def measure (callback, iterations, warmup=10):
+  for _ in range(warmup):
+    callback()
+
+  gc.disable()
+
+  # Measure the syscalls of the probe itself to subtract them
+  probe = syscalls()
+  probe = syscalls() - probe
+
+  latencies = []
+  calls = syscalls()
+
+  for _ in range(iterations):
+    start = time.perf_counter_ns()
+    callback()
+    latencies.append(time.perf_counter_ns() - start)
+
+  calls = syscalls() - calls - probe
+
+  gc.enable()
+
+  # Trace allocations in a separate pass, tracing skews latencies
+  tracemalloc.start()
+  tracemalloc.reset_peak()
+
+  before = tracemalloc.take_snapshot()
+
+  for _ in range(iterations):
+    callback()
+
+  after = tracemalloc.take_snapshot()
+  peak = tracemalloc.get_traced_memory()[1]
+
+  tracemalloc.stop()
+
+  allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename') if stat.size_diff > 0)
+
+  latencies.sort()
+
+  return {
+    'p50': percentile(latencies, 50) / 1000,
+    'p95': percentile(latencies, 95) / 1000,
+    'p99': percentile(latencies, 99) / 1000,
+    'peak': peak,
+    'retained': allocated / iterations,
+    'syscalls': calls / iterations
+  }
+
+# Loads the baseline results from the given path, if any
+def load (path):
+  if not os.path.exists(path):
+    return {}
+
+  with open(path) as baseline_file:
+    return json.load(baseline_file)
+
+# Saves the results as the baseline to the given path
+def save (results, path):
+  with open(path, 'w') as baseline_file:
+    json.dump(results, baseline_file, indent=2, sort_keys=True)
+
+# Returns the names of the cases whose median latency regressed over the threshold
+def compare (results, baseline, threshold):
+  regressions = []
+
+  for name, result in results.items():
+    if name not in baseline:
+      continue
+
+    if result['p50'] > baseline[name]['p50'] * (1 + threshold):
+      regressions.append(name)
+
+  return regressions
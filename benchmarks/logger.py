@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# A script benchmarking what a log call costs the calling thread, written
+# in place, through the queue or dropped by the throttle
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import harness
+from util.logger import Router, Throttle
+
+parser = argparse.ArgumentParser(prog='logger')
+
+parser.add_argument('--iterations', type=int, default=10000, help='how many times to run each case')
+
+opts = parser.parse_args()
+
+temp_dir = tempfile.mkdtemp(prefix='walle-logger-')
+log_path = os.path.join(temp_dir, 'all.log')
+
+# A context about the size of a published frame, as dumped in debug mode
+context = {'monitor': {'cpu': {'cores': {'util': [12.5] * 64, 'clock': [3200] * 64}}}, 'history': [[1.0] * 60] * 7}
+
+plain = Router('plain', log_path)
+queued = Router('queued', log_path, queued=True, max_bytes=4 * 1048576)
+throttled = Router('throttled', log_path, queued=True, max_bytes=4 * 1048576, throttle=Throttle())
+
+cases = {
+  'debug.off.eager': lambda: plain.disk.debug(f'context: {json.dumps(context)}'),
+  'debug.off.lazy': lambda: plain.disk.debug('context: %s', context),
+  'info.plain': lambda: plain.disk.info('turning into the next resolve cycle...'),
+  'info.queued': lambda: queued.disk.info('turning into the next resolve cycle...'),
+  'info.throttled': lambda: throttled.disk.info('turning into the next resolve cycle...')
+}
+
+print(f"{'case':<20}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'calls':>8}")
+
+try:
+  for name, callback in cases.items():
+    result = harness.measure(callback, opts.iterations)
+
+    print(f"{name:<20}{result['p50']:>10.2f}{result['p95']:>10.2f}{result['p99']:>10.2f}{result['syscalls']:>8.2f}")
+finally:
+  queued.close()
+  throttled.close()
+  shutil.rmtree(temp_dir)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# A benchmark comparing the per tick cost of reopening proc files against
+# the persistent descriptor readers of util.procfs
+
+import os
+import sys
+import time
+import builtins
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from util import procfs
+
+TICKS = 2000
+
+PARSERS = {
+  '/proc/stat': procfs.parse_cpu_times,
+  '/proc/meminfo': procfs.parse_meminfo,
+  '/proc/diskstats': procfs.parse_diskstats,
+  '/proc/net/dev': procfs.parse_net_dev,
+  '/proc/uptime': procfs.parse_uptime
+}
+
+# Reads every file reopening it on every tick, the way psutil does
+def reopen ():
+  for path, parse in PARSERS.items():
+    with open(path, 'rb') as proc_file:
+      data = proc_file.read()
+
+    parse(data, len(data))
+
+# Reads every file through the persistent readers parsing raw bytes
+def persistent (files):
+  for path, parse in PARSERS.items():
+    parse(*files[path].read())
+
+# Returns the number of read syscalls the process has made so far
+def read_syscalls ():
+  with open('/proc/self/io') as io_file:
+    for line in io_file:
+      if line.startswith('syscr:'):
+        return int(line.split()[1])
+
+# Returns the number of files opened by a single tick of the given callback
+def count_opens (callback):
+  opens = [0]
+  original = builtins.open
+
+  def counting (*args, **kwargs):
+    opens[0] += 1
+    return original(*args, **kwargs)
+
+  builtins.open = counting
+
+  try:
+    callback()
+  finally:
+    builtins.open = original
+
+  return opens[0]
+
+# Runs the callback for the given number of ticks measuring its costs
+def measure (callback):
+  # Measure the reads of the syscr probe itself to subtract it
+  probe = read_syscalls()
+  probe = read_syscalls() - probe
+
+  syscalls = read_syscalls()
+  cpu = time.process_time()
+
+  for _ in range(TICKS):
+    callback()
+
+  cpu = time.process_time() - cpu
+  syscalls = read_syscalls() - syscalls - probe
+
+  return cpu / TICKS * 1e6, syscalls / TICKS
+
+files = {path: procfs.File(path) for path in PARSERS}
+
+results = {
+  'reopen': measure(reopen) + (count_opens(reopen),),
+  'persistent': measure(lambda: persistent(files)) + (count_opens(lambda: persistent(files)),)
+}
+
+print(f'{len(PARSERS)} files over {TICKS} ticks')
+print(f"{'mode':<12}{'cpu us/tick':>14}{'reads/tick':>12}{'opens/tick':>12}")
+
+for mode, (cpu, reads, opens) in results.items():
+  print(f'{mode:<12}{cpu:>14.1f}{reads:>12.1f}{opens:>12}')
+
+saved = 1 - results['persistent'][0] / results['reopen'][0]
+
+print(f'persistent readers save {saved * 100:.0f}% cpu time per tick')
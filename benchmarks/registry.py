@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# A script measuring the startup time, rss and threads of loading and starting
+# the resolvers, comparing every resolver enabled against subsets disabled
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+parser = argparse.ArgumentParser(prog='registry')
+
+parser.add_argument('--iterations', type=int, default=10, help='how many times to run each case')
+parser.add_argument('--real', action='store_true', help='use the installed dependencies instead of fakes')
+parser.add_argument('--child', metavar='json', help=argparse.SUPPRESS)
+
+opts = parser.parse_args()
+
+# Returns the resident set size of the current process in bytes
+def rss ():
+  with open('/proc/self/statm') as statm_file:
+    return int(statm_file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+# Loads and starts the enabled resolvers, reporting the cost back as json
+def child (enabled):
+  start = time.perf_counter()
+
+  if not opts.real:
+    import fakes
+    fakes.install()
+
+  import threading
+  from util import registry
+
+  resolvers = registry.select(registry.scan(os.path.join(ROOT_DIR, 'src', 'resolvers')), enabled)
+
+  for resolver in resolvers:
+    resolver.load('resolvers')
+    resolver.hook('start', {})
+
+  print(json.dumps({
+    'time': (time.perf_counter() - start) * 1000,
+    'rss': rss(),
+    'threads': threading.active_count(),
+    'modules': len(sys.modules)
+  }))
+
+  for resolver in resolvers:
+    resolver.hook('stop')
+
+if opts.child:
+  child(json.loads(opts.child))
+  sys.exit(0)
+
+from util import registry
+
+# Disable every other resolver found, so the case keeps up with any new one
+names = registry.scan(os.path.join(ROOT_DIR, 'src', 'resolvers'))
+
+cases = {
+  'all': {},
+  'no actions': {'actions': False},
+  'no monitor': {'monitor': False},
+  'static only': {name: False for name in names if name != 'static'}
+}
+
+print(f"{'case':<16}{'time ms':>10}{'rss KiB':>10}{'threads':>9}{'modules':>9}")
+
+for name, enabled in cases.items():
+  samples = []
+
+  for _ in range(opts.iterations):
+    argv = [sys.executable, __file__, '--child', json.dumps(enabled)] + (['--real'] if opts.real else [])
+    output = subprocess.run(argv, stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout
+    samples.append(json.loads(output.splitlines()[-1]))
+
+  time_ms = sorted(sample['time'] for sample in samples)[len(samples) // 2]
+  rss_kib = sorted(sample['rss'] for sample in samples)[len(samples) // 2] // 1024
+
+  print(f"{name:<16}{time_ms:>10.1f}{rss_kib:>10}{samples[0]['threads']:>9}{samples[0]['modules']:>9}")
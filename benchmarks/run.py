@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# A script running the microbenchmark suite of the resolver callbacks and the
+# publish path, comparing the results against a stored baseline
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakes
+import harness
+
+parser = argparse.ArgumentParser(prog='benchmarks')
+
+parser.add_argument('--iterations', type=int, default=1000, help='how many times to run each case')
+parser.add_argument('--filter', metavar='text', help='run only the cases containing the given text')
+parser.add_argument('--baseline', metavar='path', default=os.path.join(ROOT_DIR, 'benchmarks', 'baseline.json'))
+parser.add_argument('--save', action='store_true', help='save the results as the new baseline')
+parser.add_argument('--threshold', type=float, default=0.25, help='the allowed median latency regression ratio')
+parser.add_argument('--gpus', type=int, default=1, help='how many fake graphics cards to pretend')
+parser.add_argument('--spawn', type=int, default=0, help='how many idle processes to spawn for the process table')
+
+opts = parser.parse_args()
+
+fakes.install(opts.gpus)
+
+from common import globals
+from common import conky
+from util import route
+from util.channel import MemoryChannel
+from util.history import History
+from resolvers import static, uptime, monitor, network, actions, processes
+
+temp_dir = tempfile.mkdtemp(prefix='walle-bench-')
+
+# Crowd the process table with idle children
+children = [subprocess.Popen(['sleep', '3600']) for _ in range(opts.spawn)]
+
+# Generate from a copy of the conkyrc template instead of the user's one
+globals.CONKYRC_FILE_PATH = os.path.join(temp_dir, '.conkyrc')
+globals.CONKY_DIR = os.path.join(temp_dir, 'conky')
+shutil.copy2(os.path.join(ROOT_DIR, 'resources', '.conkyrc'), globals.CONKYRC_FILE_PATH)
+os.makedirs(globals.CONKY_DIR)
+
+screen = conky.monitors()[0]
+
+channel = MemoryChannel(os.path.join(temp_dir, '.channel'))
+
+history = History([
+  'monitor.cpu.util',
+  'monitor.cpu.temp',
+  'monitor.memory.util',
+  'monitor.gpu.util',
+  'monitor.gpu.temp',
+  'network.speeds.bytes.sent',
+  'network.speeds.bytes.recv'
+])
+
+# Builds and serializes a frame the same way the resolver's publish task does
+def publish ():
+  data = {
+    'static': static.state.current.data,
+    'uptime': uptime.state.current.data,
+    'monitor': monitor.state.current.data,
+    'network': network.state.current.data,
+    'actions': actions.state.current.data
+  }
+
+  data['history'] = history.last(60)
+
+  channel.publish(json.dumps(data).encode())
+
+# Resolves the active interface through the iproute2 fallback
+def route_fallback ():
+  route.query()
+
+route.subprocess = fakes.subprocess()
+
+# Runs every monitor task the way a full tick would
+def monitor_tick ():
+  monitor.resolve_cpu()
+  monitor.resolve_memory()
+  monitor.resolve_gpu()
+  monitor.resolve_disk()
+  monitor.resolve_io()
+
+# Alternates the monitor so every call rewrites the conkyrc of the instance
+def conky_changed (monitors=[fakes.Monitor('DP-1', 0, 0, 1920, 1080, True), screen]):
+  monitors.reverse()
+  conky.generate(0, monitors[0])
+
+cases = {
+  'static.resolve': static.resolve,
+  'uptime.resolve': uptime.resolve,
+  'monitor.cpu': monitor.resolve_cpu,
+  'monitor.memory': monitor.resolve_memory,
+  'monitor.gpu': monitor.resolve_gpu,
+  'monitor.disk': monitor.resolve_disk,
+  'monitor.io': monitor.resolve_io,
+  'monitor.tick': monitor_tick,
+  'network.resolve': network.resolve,
+  'network.fallback': route_fallback,
+  'actions.resolve': actions.resolve,
+  'processes.resolve': processes.resolve,
+  'history.record': lambda: history.record({'monitor': monitor.state.current.data}, 0),
+  'publish.serialize': publish,
+  'conky.generate': lambda: conky.generate(0, screen),
+  'conky.regenerate': conky_changed
+}
+
+results = {}
+
+print(f"{'case':<20}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'peak B':>10}{'kept B':>10}{'calls':>8}")
+
+try:
+  for name, callback in cases.items():
+    if opts.filter and opts.filter not in name:
+      continue
+
+    result = harness.measure(callback, opts.iterations)
+    results[name] = result
+
+    print(f"{name:<20}{result['p50']:>10.1f}{result['p95']:>10.1f}{result['p99']:>10.1f}"
+      f"{result['peak']:>10}{result['retained']:>10.0f}{result['syscalls']:>8.1f}")
+finally:
+  channel.close()
+  shutil.rmtree(temp_dir)
+
+  for child in children:
+    child.kill()
+    child.wait()
+
+if opts.save:
+  harness.save(results, opts.baseline)
+  print(f"baseline saved to '{opts.baseline}'")
+  sys.exit(0)
+
+baseline = harness.load(opts.baseline)
+
+if not baseline:
+  print('no baseline found to compare against, run with --save to store one')
+
+  # Fail in ci rather than letting any regression through unnoticed
+  sys.exit(1 if os.environ.get('CI') else 0)
+
+regressions = harness.compare(results, baseline, opts.threshold)
+
+for name in regressions:
+  print(f"regression: '{name}' median {results[name]['p50']:.1f}us against {baseline[name]['p50']:.1f}us")
+
+sys.exit(1 if regressions else 0)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# A script benchmarking the startup time of the cli commands and the spawn
+# readiness handshake, comparing the results against a stored baseline
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BIN_FILE_PATH = os.path.join(ROOT_DIR, 'src', 'bin.py')
+
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import harness
+
+parser = argparse.ArgumentParser(prog='startup')
+
+parser.add_argument('--iterations', type=int, default=20, help='how many times to run each case')
+parser.add_argument('--filter', metavar='text', help='run only the cases containing the given text')
+parser.add_argument('--baseline', metavar='path', default=os.path.join(ROOT_DIR, 'benchmarks', 'startup.json'))
+parser.add_argument('--save', action='store_true', help='save the results as the new baseline')
+parser.add_argument('--threshold', type=float, default=0.25, help='the allowed median latency regression ratio')
+
+opts = parser.parse_args()
+
+from common import globals
+from util import system
+
+temp_dir = tempfile.mkdtemp(prefix='walle-startup-')
+
+# Run the cli against a throwaway home as a non root user
+env = os.environ.copy()
+env['HOME'] = temp_dir
+env['USER'] = env['LOGNAME'] = 'walle'
+
+base_dir = os.path.join(temp_dir, '.config', globals.PKG_NAME)
+os.makedirs(base_dir)
+
+# A child signaling readiness right away, standing in for the resolver
+child = os.path.join(temp_dir, 'child.py')
+
+with open(child, 'w') as child_file:
+  child_file.write('\n'.join([
+    'import sys, time',
+    f"sys.path.insert(0, '{os.path.join(ROOT_DIR, 'src')}')",
+    'from util import system',
+    'system.notify_ready()',
+    'time.sleep(5)'
+  ]))
+
+# Returns a case running the cli with the given arguments
+def command (*argv):
+  def run ():
+    process = subprocess.run([sys.executable, BIN_FILE_PATH, *argv], env=env,
+      stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    if process.returncode != 0:
+      raise Exception(f"[Errno 3] Failed to run '{' '.join(argv)}': {process.stderr.decode().strip()}")
+
+  return run
+
+# Spawns the child through the readiness handshake and kills it right after
+def handshake ():
+  pid = system.spawn(f'{sys.executable} {child}', os.path.join(temp_dir, 'all.log'),
+    ready_path=os.path.join(temp_dir, '.ready'))
+
+  os.kill(pid, 15)
+  os.waitpid(pid, 0)
+
+cases = {
+  'cli.version': command('--version'),
+  'cli.help': command('config', '--help'),
+  'cli.history': command('history', '--series', 'monitor.cpu.util', '--hours', '1'),
+  'spawn.handshake': handshake
+}
+
+results = {}
+
+print(f"{'case':<20}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+
+try:
+  for name, callback in cases.items():
+    if opts.filter and opts.filter not in name:
+      continue
+
+    latencies = []
+
+    for _ in range(opts.iterations):
+      start = time.perf_counter()
+      callback()
+      latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+
+    results[name] = {
+      'p50': harness.percentile(latencies, 50),
+      'p95': harness.percentile(latencies, 95),
+      'max': latencies[-1]
+    }
+
+    print(f"{name:<20}{results[name]['p50']:>10.1f}{results[name]['p95']:>10.1f}{results[name]['max']:>10.1f}")
+finally:
+  shutil.rmtree(temp_dir)
+
+if opts.save:
+  harness.save(results, opts.baseline)
+  print(f"baseline saved to '{opts.baseline}'")
+  sys.exit(0)
+
+baseline = harness.load(opts.baseline)
+
+if not baseline:
+  print('no baseline found to compare against, run with --save to store one')
+
+  # Fail in ci rather than letting any regression through unnoticed
+  sys.exit(1 if os.environ.get('CI') else 0)
+
+regressions = harness.compare(results, baseline, opts.threshold)
+
+for name in regressions:
+  print(f"regression: '{name}' median {results[name]['p50']:.1f}ms against {baseline[name]['p50']:.1f}ms")
+
+sys.exit(1 if regressions else 0)
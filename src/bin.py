@@ -9,24 +9,26 @@ if getpass.getuser() == 'root':
   print("[Errno 13] Don't run as root user")
   sys.exit(1)
 
+# Import only what every command needs, heavier modules are loaded lazily
+# by the commands that actually use them to keep the startup fast
 import os
-import time
 from common import globals
 from common import args
-from common import config
-from common import conky
 from util import system
 from util.logger import Router
 
 # Starts the resolver process
-def start_resolver (debug=False):
+def start_resolver (debug=False, profile_window=None):
   pid = system.read(globals.RESOLVER_PID_FILE_PATH)
 
   if not system.isUp(pid):
     cmd = globals.RESOLVER_FILE_PATH + (' --debug' if debug else '')
 
-    # Spawn resolver process
-    pid = system.spawn(cmd, globals.LOG_FILE_PATH)
+    if profile_window:
+      cmd += f' --profile --profile-window {profile_window}'
+
+    # Spawn resolver process waiting for its first published frame
+    pid = system.spawn(cmd, globals.STDIO_FILE_PATH, ready_path=globals.RESOLVER_READY_FILE_PATH, max_bytes=globals.STDIO_MAX_SIZE)
 
     # Save the pid to the disk
     system.write(pid, globals.RESOLVER_PID_FILE_PATH)
@@ -37,64 +39,110 @@ def start_resolver (debug=False):
 def stop_resolver ():
   pid = system.read(globals.RESOLVER_PID_FILE_PATH)
 
-  if system.kill(pid, globals.LOG_FILE_PATH):
+  if system.kill(pid, globals.STDIO_FILE_PATH):
     system.remove(globals.RESOLVER_PID_FILE_PATH)
 
   logger.disk.info('resolver process is down')
 
-# Starts the conky process
+# Starts a conky instance on every selected monitor
 def start_conky (debug=False):
-  pid = system.read(globals.CONKY_PID_FILE_PATH)
-
-  if not system.isUp(pid):
-    # Initialize conky for the current system setup
-    conky.init()
+  from common import config
+  from common import conky
 
-    cmd = 'conky -b -p 1 -c ' + globals.CONKYRC_FILE_PATH + (' --debug' if debug else '')
+  connected = conky.monitors()
 
-    # Define env variable to set debug mode or not
-    debug_env = os.environ.copy()
-    debug_env['DEBUG_MODE'] = str(debug).lower()
+  if not connected:
+    logger.disk.warn('no monitors have been detected to start conky on')
+    return
 
-    # Spawn the conky process
-    pid = system.spawn(cmd, globals.LOG_FILE_PATH, debug_env)
+  changes = conky.sync(config.read().get('monitors', [0]), debug, connected=connected)
 
-    # Save pid to the disk
-    system.write(pid, globals.CONKY_PID_FILE_PATH)
+  for index, pid in conky.running().items():
+    state = 'up' if index in changes['started'] else 'already up'
+    logger.disk.info(f"conky process on monitor {index} is {state} with pid '{pid}'")
 
-  logger.disk.info(f"conky process is up with pid '{pid}'")
-
-# Stops the conky process
+# Stops every conky instance
 def stop_conky ():
-  pid = system.read(globals.CONKY_PID_FILE_PATH)
+  from common import conky
 
-  if system.kill(pid, globals.LOG_FILE_PATH):
-    system.remove(globals.CONKY_PID_FILE_PATH)
+  conky.stop_all()
 
-  logger.disk.info('conky process is down')
+  logger.disk.info('conky processes are down')
 
 # Restarts the resolver and conky processes
 def restart():
   stop_conky()
-  time.sleep(1)
   stop_resolver()
 
-  time.sleep(1)
-
   start_resolver()
-  time.sleep(1)
   start_conky()
 
-# Returns if should restart processes when any process is down
-def should_restart ():
+# Returns the telemetry block of the latest data the resolver has published
+def read_stats (reader):
+  import json
+
+  if reader:
+    result = reader.read()
+
+    if result is None:
+      return None
+
+    data = json.loads(bytes(result[1]))
+  else:
+    with open(globals.DATA_FILE_PATH) as data_file:
+      data = json.load(data_file)
+
+  return data.get('resolver')
+
+# Prints the telemetry block as a table of the process and its tasks
+def print_stats (stats):
+  print(f"pid {stats['pid']}  cpu {stats['cpu']:.2f}%  cpu time {stats['cpu_time']:.2f}s  "
+    f"rss {stats['rss'] / 1048576:.1f}MiB  threads {stats['threads']}")
+  print(f"cycle {stats['cycle']:.3f}ms  missed {stats['missed']}  "
+    f"published {stats['bytes']}B  total {stats['bytes_total'] / 1048576:.1f}MiB")
+
+  policy = stats.get('policy')
+
+  if policy:
+    power = 'ac' if policy['ac'] else 'battery'
+
+    print(f"sampling {policy['mode']} x{policy['factor']}  {power}  idle {policy['idle']}s  "
+      f"wakeups {stats['wakeups']}  skipped {policy['skipped']} runs  saved {policy['saved']:.3f}s")
+
+  print()
+  print(f"{'task':<12}{'latency ms':>12}{'missed':>8}{'ticks':>10}")
+
+  for name, task in stats['tasks'].items():
+    print(f"{name:<12}{task['latency']:>12.3f}{task['missed']:>8}{task['ticks']:>10}")
+
+# Applies the updated configuration to the running processes, signaling the
+# resolver to reload and reconciling the conky instances with the selected monitors
+def reload ():
+  from common import config
+  from common import conky
+
   resolver_pid = system.read(globals.RESOLVER_PID_FILE_PATH)
-  conky_pid = system.read(globals.CONKY_PID_FILE_PATH)
+  instances = conky.running()
+
+  # Recover with a full restart only if the resolver is down, conky may be
+  # down just because none of the selected monitors is connected
+  if not system.isUp(resolver_pid):
+    if instances:
+      restart()
+
+    return
+
+  import signal
 
-  # Restart only if both up or one of them is down
-  if not system.isUp(resolver_pid) and not system.isUp(conky_pid):
-    return False
+  os.kill(int(resolver_pid), signal.SIGHUP)
+  logger.disk.info(f"resolver process with pid '{resolver_pid}' has been signaled to reload")
 
-  return True
+  # Start or stop only the instances of the monitors selected or deselected
+  changes = conky.sync(config.read().get('monitors', [0]))
+
+  for change, indices in changes.items():
+    if indices:
+      logger.disk.info(f"conky processes on monitors {indices} have been {change}")
 
 try:
   # Initialize logging router
@@ -111,8 +159,7 @@ try:
       logger.set_level('DEBUG')
       logger.disk.debug('debug mode has been enabled')
 
-    start_resolver(opts.debug)
-    time.sleep(1)
+    start_resolver(opts.debug, opts.profile_window if opts.profile else None)
     start_conky(opts.debug)
 
   # Stop processes
@@ -120,7 +167,6 @@ try:
     logger.disk.info('stopping processes...')
 
     stop_conky()
-    time.sleep(1)
     stop_resolver()
 
   # Restart processes
@@ -133,34 +179,32 @@ try:
   if opts.command == 'reset':
     logger.disk.info('resetting configuration...')
 
+    from common import config
+
     config.reset()
-    conky.reset()
 
     logger.disk.info('configuration has been set to default settings')
 
-    if should_restart():
-      restart()
+    reload()
 
   # Update configuration
   if opts.command == 'config':
     logger.disk.info('updating configuration settings...')
 
-    config.update(opts)
+    from common import config
 
-    # Update the conky config instantly
-    if opts.monitor != None:
-      conky.switch(opts.monitor)
-      logger.stdout.info('Warning: monitor switch is an experimental operation')
+    config.update(opts)
 
     logger.disk.info('configuration settings have been updated')
 
-    if should_restart():
-      restart()
+    reload()
 
   # Export configuration to preset
   if opts.command == 'preset' and opts.save != None:
     logger.disk.info('exporting preset file...')
 
+    from common import config
+
     config.export(opts.save)
 
     logger.disk.info(f"preset file has been saved to '{opts.save}'")
@@ -169,12 +213,85 @@ try:
   if opts.command == 'preset' and opts.load != None:
     logger.disk.info('loading preset file...')
 
+    from common import config
+
     config.load(opts.load)
 
     logger.disk.info(f"preset has been loaded from '{opts.load}'")
 
-    if should_restart():
-      restart()
+    reload()
+
+  # Print the recorded history of a series
+  if opts.command == 'history':
+    import time
+    from datetime import datetime
+    from util import journal
+
+    since = time.time() - opts.hours * 3600
+
+    for timestamp, value in journal.query(globals.JOURNAL_DIR, opts.series, since):
+      print(f"{datetime.fromtimestamp(timestamp).isoformat(timespec='seconds')} {value:.2f}")
+
+  # Print the resolved data once or on every published frame
+  if opts.command == 'status':
+    import time
+    from common import status
+    from util.api import Client
+
+    client = Client(globals.SOCKET_FILE_PATH)
+    keys = ['static', 'uptime', 'monitor', 'network', 'actions', 'processes', 'frame']
+
+    try:
+      if opts.watch:
+        # Block on the subscription instead of polling on a timer
+        for data in client.subscribe(keys):
+          lines = status.render(data, time.time())
+
+          if sys.stdout.isatty():
+            print('\033[H\033[J', end='')
+
+          print('\n'.join(lines), flush=True)
+      else:
+        print('\n'.join(status.render(client.snapshot(keys), time.time())))
+    except KeyboardInterrupt:
+      pass
+    finally:
+      client.close()
+
+  # Print the resolver's own telemetry until interrupted
+  if opts.command == 'stats':
+    import time
+    from common import config
+    from util.channel import Reader
+
+    if not system.isUp(system.read(globals.RESOLVER_PID_FILE_PATH)):
+      raise Exception('[Errno 3] Resolver process is not running')
+
+    reader = None
+
+    if config.read().get('channel', 'mmap') != 'file':
+      reader = Reader(globals.CHANNEL_FILE_PATH)
+
+    try:
+      while True:
+        stats = read_stats(reader)
+
+        if stats:
+          # Redraw in place only when printing to a terminal
+          if sys.stdout.isatty() and not opts.once:
+            print('\033[H\033[J', end='')
+
+          print_stats(stats)
+
+          if opts.once:
+            break
+
+        time.sleep(opts.interval)
+    except KeyboardInterrupt:
+      pass
+    finally:
+      if reader:
+        reader.close()
 
   system.exit(0)
 except Exception as exc:
@@ -35,6 +35,13 @@ def pos_int (value):
 
   return number
 
+# Asserts if the given value is a monitor index or all
+def monitor_index (value):
+  if value == 'all':
+    return value
+
+  return zero_pos_int(value)
+
 # Parses the args schema to the given args
 def parse (name, version):
   parser = argparse.ArgumentParser(
@@ -67,11 +74,25 @@ def parse (name, version):
 
   startParser.set_defaults(debug=False)
 
+  startParser.add_argument(
+    '--profile',
+    dest='profile',
+    action='store_true',
+    help='sample the resolver process into a collapsed stacks file')
+
+  startParser.add_argument(
+    '--profile-window',
+    dest='profile_window',
+    type=pos_int,
+    metavar='secs',
+    default=60,
+    help='how many secs of samples each profile dump should cover')
+
   subparsers.add_parser('restart', help='restart %(prog)s widget')
   subparsers.add_parser('stop', help='stop %(prog)s widget')
   subparsers.add_parser('reset', help='reset %(prog)s back to its default settings')
 
-  configParser = subparsers.add_parser('config', help='change configuration settings and restart')
+  configParser = subparsers.add_parser('config', help='change configuration settings and apply them live')
 
   configParser.add_argument(
     '--dark',
@@ -119,9 +140,10 @@ def parse (name, version):
 
   configParser.add_argument(
     '--monitor',
-    type=zero_pos_int,
+    type=monitor_index,
+    nargs='+',
     metavar='index',
-    help='the monitor index the widget should render on (experimental)')
+    help="the monitor indices the widget should render on, or 'all'")
 
   presetParser = subparsers.add_parser('preset', help='save and load %(prog)s preset files')
   presetGroup = presetParser.add_mutually_exclusive_group()
@@ -136,4 +158,40 @@ def parse (name, version):
     metavar='path',
     help='the path the preset file will be loaded from')
 
+  historyParser = subparsers.add_parser('history', help='print the recorded history of a series')
+
+  historyParser.add_argument(
+    '--series',
+    metavar='path',
+    required=True,
+    help="the dotted path of the series, e.g. 'monitor.cpu.temp'")
+
+  historyParser.add_argument(
+    '--hours',
+    type=pos_int,
+    metavar='number',
+    default=24,
+    help='how many hours back the history should start from')
+
+  statusParser = subparsers.add_parser('status', help='print the data the resolver is currently producing')
+
+  statusParser.add_argument(
+    '--watch',
+    action='store_true',
+    help='keep refreshing in place on every published frame')
+
+  statsParser = subparsers.add_parser('stats', help="print the resolver's own telemetry live")
+
+  statsParser.add_argument(
+    '--interval',
+    type=pos_int,
+    metavar='secs',
+    default=1,
+    help='how often the telemetry should be refreshed')
+
+  statsParser.add_argument(
+    '--once',
+    action='store_true',
+    help='print the telemetry once and exit')
+
   return parser.parse_args()
\ No newline at end of file
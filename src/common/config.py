@@ -51,6 +51,9 @@ def update (opts):
   if opts.right != None:
     settings['offsets']['right'] = opts.right
 
+  if opts.monitor != None:
+    settings['monitors'] = scalar('all') if 'all' in opts.monitor else opts.monitor
+
   write(settings)
 
 # Resets configuration to default settings
@@ -63,6 +66,7 @@ def reset ():
   settings['offsets']['left'] = 0
   settings['offsets']['bottom'] = 0
   settings['offsets']['right'] = 0
+  settings['monitors'] = [0]
 
   write(settings)
 
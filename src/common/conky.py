@@ -1,53 +1,244 @@
-# A module exporting utility methods to manage conky
+# A module exporting utility methods to manage the conky instances,
+# one per selected monitor, each having its own conkyrc and geometry
 
 import os
 import re
 import screeninfo
 from common import globals
+from util import system
 
-# Writes the given settings to the conkyrc file
-def config (settings):
-  if not os.path.exists(globals.CONKYRC_FILE_PATH):
+# Matches a setting line of the conky.config table, the value excluding any comma
+SETTING = re.compile(r'^[ \t]*(\w+)[ \t]*=[ \t]*(.+?)[ \t]*,?[ \t]*$')
+
+class Template:
+  # Parses the conkyrc into its lines, indexing the line of every setting
+  # along with the text around its value
+  def __init__ (self, content):
+    self.lines = content.splitlines(keepends=True)
+    self.settings = {}
+
+    inside = False
+
+    for index, line in enumerate(self.lines):
+      if not inside:
+        inside = line.lstrip().startswith('conky.config')
+        continue
+
+      if line.lstrip().startswith('}'):
+        break
+
+      match = SETTING.match(line.rstrip('\r\n'))
+
+      if match:
+        self.settings[match.group(1)] = [index, line[:match.start(2)], match.group(2), line[match.end(2):]]
+
+  # Returns the lua literals of the given settings differing from the template,
+  # ignoring any settings the template has not
+  def diff (self, settings):
+    changes = {}
+
+    for key, value in settings.items():
+      if key in self.settings:
+        value = literal(value)
+
+        if value != self.settings[key][2]:
+          changes[key] = value
+
+    return changes
+
+  # Returns the content having the given changes applied, leaving the template as is
+  def render (self, changes=None):
+    lines = self.lines
+
+    if changes:
+      lines = list(lines)
+
+      for key, value in changes.items():
+        setting = self.settings[key]
+        lines[setting[0]] = setting[1] + value + setting[3]
+
+    return ''.join(lines)
+
+# Parsed templates by path, along with the file stat they have been parsed at
+templates = {}
+
+# Returns the given value as a lua literal
+def literal (value):
+  if type(value) is bool:
+    return 'true' if value else 'false'
+
+  if type(value) is str:
+    return "'" + value + "'"
+
+  return str(value)
+
+# Returns the stat of the file telling whether it has been changed
+def signature (path):
+  stat = os.stat(path)
+
+  return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+# Returns the parsed template of the conkyrc file, parsing it only if it
+# has been changed since the last time
+def load (path):
+  try:
+    stat = signature(path)
+  except FileNotFoundError:
     raise Exception('[Errno 2] Conkyrc file not found')
 
-  newContent = ''
+  cached = templates.get(path)
+
+  if cached and cached[0] == stat:
+    return cached[1]
+
+  with open(path, 'r') as conkyrc_file:
+    template = Template(conkyrc_file.read())
+
+  templates[path] = (stat, template)
+
+  return template
+
+# Writes the content into a temp file and renames it atomically
+def write (path, content):
+  temp_path = path + '.tmp'
+
+  with open(temp_path, 'w') as conkyrc_file:
+    conkyrc_file.write(content)
+
+  os.replace(temp_path, path)
+
+# Returns the paths of the conkyrc, pid and ready files of the instance on the given monitor
+def paths (index):
+  base = os.path.join(globals.CONKY_DIR, str(index))
+
+  return base + '.conkyrc', base + '.pid', base + '.ready'
+
+# Returns every connected monitor by its xinerama index, none if the display server is unreachable
+def monitors ():
+  try:
+    return dict(enumerate(screeninfo.get_monitors()))
+  except screeninfo.ScreenInfoError:
+    return {}
+
+# Returns the indices of the selected monitors that are connected
+def select (selection, connected):
+  if selection == 'all':
+    return sorted(connected)
+
+  return [index for index in selection if index in connected]
+
+# Returns the conkyrc settings sizing the instance to its monitor
+def geometry (index, monitor):
+  return {
+    'xinerama_head': index,
+    'maximum_width': monitor.width,
+    'minimum_width': monitor.width,
+    'minimum_height': monitor.height
+  }
+
+# Generates the conkyrc of the instance from the template, writing it only if changed
+def generate (index, monitor):
+  template = load(globals.CONKYRC_FILE_PATH)
+  content = template.render(template.diff(geometry(index, monitor)))
+
+  path = paths(index)[0]
+
+  try:
+    with open(path) as conkyrc_file:
+      if conkyrc_file.read() == content:
+        return False
+  except FileNotFoundError:
+    pass
+
+  write(path, content)
+
+  return True
+
+# Returns the pid of every running instance by its monitor index
+def running ():
+  instances = {}
+
+  if not os.path.isdir(globals.CONKY_DIR):
+    return instances
+
+  for filename in os.listdir(globals.CONKY_DIR):
+    name, ext = os.path.splitext(filename)
+
+    if ext != '.pid' or not name.isdigit():
+      continue
+
+    pid = system.read(os.path.join(globals.CONKY_DIR, filename))
+
+    if system.isUp(pid):
+      instances[int(name)] = pid
+
+  return instances
+
+# Spawns the instance on the given monitor, waiting for its first draw if asked to
+def start (index, debug=False, wait=True):
+  conkyrc_path, pid_path, ready_path = paths(index)
+
+  cmd = 'conky -b -p 1 -c ' + conkyrc_path + (' --debug' if debug else '')
+
+  # Define env variable to set debug mode or not
+  debug_env = os.environ.copy()
+  debug_env['DEBUG_MODE'] = str(debug).lower()
+
+  pid = system.spawn(cmd, globals.STDIO_FILE_PATH, debug_env, ready_path if wait else None, max_bytes=globals.STDIO_MAX_SIZE)
+
+  system.write(pid, pid_path)
+
+  return pid
+
+# Stops the instance on the given monitor
+def stop (index):
+  pid_path = paths(index)[1]
+
+  if system.kill(system.read(pid_path), globals.STDIO_FILE_PATH):
+    system.remove(pid_path)
+
+# Stops every instance, along with any left by a single instance install
+def stop_all ():
+  for index in running():
+    stop(index)
 
-  with open(globals.CONKYRC_FILE_PATH, 'r') as conkyrc_file:
-    for line in conkyrc_file:
-      for key in settings:
-        if re.match(r'^[ ]*{}[ ]*=[ ]*.+,[ ]*$'.format(key), line):
-          value = settings[key]
+  if system.kill(system.read(globals.CONKY_PID_FILE_PATH), globals.STDIO_FILE_PATH):
+    system.remove(globals.CONKY_PID_FILE_PATH)
 
-          if type(value) is str:
-            value = "'" + value + "'"
+# Reconciles the instances with the selected monitors, regenerating the conkyrc
+# of every instance and starting or stopping only those whose monitor has come
+# or gone, returns the indices of the instances started, stopped and resized
+def sync (selection, debug=False, wait=True, connected=None):
+  changes = {
+    'started': [],
+    'stopped': [],
+    'resized': []
+  }
 
-          line = '    ' + key + ' = ' + str(value) + ',\n'
+  if connected is None:
+    connected = monitors()
 
-      newContent += line
+  # Keep the instances as they are while the display server cannot tell
+  if not connected:
+    return changes
 
-  with open(globals.CONKYRC_FILE_PATH, 'w') as conkyrc_file:
-    conkyrc_file.write(newContent)
+  os.makedirs(globals.CONKY_DIR, exist_ok=True)
 
-# Initializes various conky settings
-def init ():
-  # Resolve primary monitor resolution
-  width = height = 0
+  selected = select(selection, connected)
+  instances = running()
 
-  for monitor in screeninfo.get_monitors():
-    if monitor.is_primary:
-      width = monitor.width
-      height = monitor.height
+  for index in instances:
+    if index not in selected:
+      stop(index)
+      changes['stopped'].append(index)
 
-  config({
-    'maximum_width': width,
-    'minimum_width': width,
-    'minimum_height': height
-  })
+  for index in selected:
+    # A running conky reloads its conkyrc by itself once it gets replaced
+    if generate(index, connected[index]) and index in instances:
+      changes['resized'].append(index)
 
-# Sets the monitor index the conky should render on
-def switch (index):
-  config({'xinerama_head': index})
+    if index not in instances:
+      start(index, debug, wait)
+      changes['started'].append(index)
 
-# Resets conky configuration to default settings
-def reset ():
-  config({'xinerama_head': 0})
\ No newline at end of file
+  return changes
@@ -9,8 +9,18 @@ BASE_DIR = os.path.expanduser('~/.config') + '/' + PKG_NAME
 CONFIG_FILE_PATH = BASE_DIR + '/config.yml'
 CONKYRC_FILE_PATH = BASE_DIR + '/.conkyrc'
 LOG_FILE_PATH = BASE_DIR + '/all.log'
+LOG_MAX_SIZE = 4 * 1048576
+LOG_BACKUPS = 3
+STDIO_FILE_PATH = BASE_DIR + '/stdio.log'
+STDIO_MAX_SIZE = 1048576
+CONKY_DIR = BASE_DIR + '/conky'
 CONKY_PID_FILE_PATH = BASE_DIR + '/conky.pid'
 RESOLVER_FILE_PATH = '/usr/share/' + PKG_NAME + '/bin/resolver.py'
 RESOLVER_PID_FILE_PATH = BASE_DIR + '/resolver.pid'
+RESOLVER_READY_FILE_PATH = BASE_DIR + '/.resolver.ready'
 DATA_FILE_PATH = BASE_DIR + '/.data'
+CHANNEL_FILE_PATH = BASE_DIR + '/.channel'
+SOCKET_FILE_PATH = BASE_DIR + '/.socket'
+JOURNAL_DIR = BASE_DIR + '/journal'
+PROFILE_FILE_PATH = BASE_DIR + '/resolver.folded'
 TIME_FORMAT='%Y-%m-%dT%H:%M:%S.%s'
\ No newline at end of file
@@ -0,0 +1,112 @@
+# A module exporting the terminal view of the resolved data
+
+# Returns the given bytes per second as a human readable speed
+def speed (value):
+  for unit in ['B/s', 'KiB/s', 'MiB/s']:
+    if abs(value) < 1024:
+      return f'{value:.1f}{unit}'
+
+    value /= 1024
+
+  return f'{value:.1f}GiB/s'
+
+# Returns the lines of the static and uptime sections
+def system (data):
+  lines = []
+
+  static = data.get('static')
+
+  if static:
+    release = static['release']
+    login = static['login']
+    cpu = static['hardware']['cpu']
+
+    lines.append(f"system   {login['user']}@{login['host']}  {release['name']} {release['version']} "
+      f"{release['codename']} {release['arch']}  {cpu['cores']} cores {cpu['threads']} threads")
+
+  uptime = data.get('uptime')
+
+  if uptime:
+    lines.append(f"uptime   {uptime['hours']}h {uptime['mins']:02}m {uptime['secs']:02}s")
+
+  return lines
+
+# Returns the lines of the monitor section
+def monitor (data):
+  monitor = data.get('monitor')
+
+  if not monitor:
+    return []
+
+  cpu = monitor['cpu']
+  memory = monitor['memory']
+  gpu = monitor['gpu']
+  disk = monitor['disk']
+
+  return [
+    f"cpu      {cpu['util']:5.1f}%  {cpu['clock']}MHz  {cpu['temp']}°C",
+    f"memory   {memory['util']:5.1f}%  {memory['used']}MiB",
+    f"gpu      {gpu['util']:5.1f}%  {gpu['used']}MiB  {gpu['temp']}°C",
+    f"disk     {disk['util']:5.1f}%  read {speed(disk['speeds']['read'])}  write {speed(disk['speeds']['write'])}"
+  ]
+
+# Returns the lines of the network section
+def network (data):
+  network = data.get('network')
+
+  if not network:
+    return []
+
+  speeds = network['speeds']['bytes']
+  nic = network['nic'] if network['conn'] else 'disconnected'
+
+  return [
+    f"network  {nic}  up {speed(speeds['sent'])}  down {speed(speeds['recv'])}  "
+      f"sent {network['bytes']['sent']}MiB  recv {network['bytes']['recv']}MiB"
+  ]
+
+# Returns the lines of the actions section
+def actions (data):
+  actions = data.get('actions')
+
+  if not actions:
+    return []
+
+  return [
+    f"actions  {actions['total']}/min  strokes {actions['strokes']}  clicks {actions['clicks']}  "
+      f"scrolls {actions['scrolls']}  moves {actions['moves']}"
+  ]
+
+# Returns the lines of the processes ranked top by cpu
+def processes (data):
+  processes = data.get('processes')
+
+  if not processes:
+    return []
+
+  lines = [f"top      {processes['count']} processes"]
+
+  for pid, name, cpu, rss, io in processes['cpu']:
+    lines.append(f"         {pid:>7}  {name[:16]:<16} {cpu:5.1f}%  {rss:8.1f}MiB  {speed(io)}")
+
+  return lines
+
+# Returns the lines of the frame latency, given the time it has been received
+def latency (data, now):
+  frame = data.get('frame')
+
+  if not frame:
+    return []
+
+  # The age of each sample at the time the frame has been published
+  ages = [f"{key} {(frame['time'] - sample['time']) * 1000:.0f}ms"
+    for key, sample in frame['samples'].items() if sample['time'] > 0]
+
+  return [
+    f"frame    #{frame['seq']}  delivered in {(now - frame['time']) * 1000:.1f}ms",
+    f"ages     {'  '.join(ages)}"
+  ]
+
+# Returns the lines rendering every section of the given data
+def render (data, now):
+  return system(data) + monitor(data) + network(data) + actions(data) + processes(data) + latency(data, now)
@@ -1,27 +1,35 @@
 # A listener module to count cross platform keyboard events
 
 from pynput import keyboard
+from util.activity import Counter, presence
 
 state = {
-  'up': False,
-  'data': {
-    'strokes': 0
-  }
+  'up': False
 }
 
-# Counts up the key press event
-def on_press (key):
-  state['data']['strokes'] += 1
+counters = {
+  'strokes': Counter()
+}
+
+# Counts up the key press event, binding the counter to skip any lookups
+def on_press (key, strokes=counters['strokes'], touch=presence.touch):
+  strokes.count += 1
+  touch()
 
 # Stops the listener thread
 def stop ():
   listener.stop()
+
+  if state['up']:
+    presence.listeners -= 1
+
   state['up'] = False
 
 # Spawns the listener thread
 def start ():
   listener.start()
   state['up'] = True
+  presence.listeners += 1
 
 # Creating the actual keyboard listener
-listener = keyboard.Listener(on_press=on_press)
\ No newline at end of file
+listener = keyboard.Listener(on_press=on_press)
@@ -1,41 +1,70 @@
 # A listener module to count cross platform mouse events
 
 from pynput import mouse
+from util.activity import Counter, presence
 
 state = {
   'up': False,
-  'data': {
-    'clicks': 0,
-    'scrolls': 0,
-    'moves': 0
-  }
+  'mode': 'count',
+  'listener': None,
+  'controller': None,
+  'position': None
 }
 
-# Counts up left, middle and right click events ignoring any releases
-def on_click (x, y, button, pressed):
-  if not pressed:
-    return
+counters = {
+  'clicks': Counter(),
+  'scrolls': Counter(),
+  'moves': Counter()
+}
 
-  state['data']['clicks'] += 1
+# Counts up left, middle and right click events ignoring any releases
+def on_click (x, y, button, pressed, clicks=counters['clicks'], touch=presence.touch):
+  if pressed:
+    clicks.count += 1
+    touch()
 
 # Counts up vertical and horizontal scroll events
-def on_scroll (x, y, dx, dy):
-  state['data']['scrolls'] += abs(dx)
-  state['data']['scrolls'] += abs(dy)
+def on_scroll (x, y, dx, dy, scrolls=counters['scrolls'], touch=presence.touch):
+  scrolls.count += abs(dx) + abs(dy)
+  touch()
 
 # Counts up move events
-def on_move (x, y):
-  state['data']['moves'] += 1
+def on_move (x, y, moves=counters['moves'], touch=presence.touch):
+  moves.count += 1
+  touch()
+
+# Counts up a move if the pointer has moved since the last sample
+def sample ():
+  if state['mode'] != 'sample' or not state['up']:
+    return
+
+  position = state['controller'].position
+
+  if position != state['position']:
+    counters['moves'].count += 1
+    state['position'] = position
+    presence.touch()
 
 # Stops the listener thread
 def stop ():
-  listener.stop()
+  if state['listener']:
+    state['listener'].stop()
+
+  if state['up']:
+    presence.listeners -= 1
+
   state['up'] = False
 
-# Spawns the listener thread
-def start ():
-  listener.start()
-  state['up'] = True
+# Spawns the listener thread, sampling the pointer instead of counting moves
+def start (mode='count'):
+  state['mode'] = mode
+
+  if mode == 'sample':
+    state['controller'] = mouse.Controller()
+    state['listener'] = mouse.Listener(on_click=on_click, on_scroll=on_scroll)
+  else:
+    state['listener'] = mouse.Listener(on_click=on_click, on_scroll=on_scroll, on_move=on_move)
 
-# Creating the actual mouse listener
-listener = mouse.Listener(on_click=on_click, on_scroll=on_scroll, on_move=on_move)
\ No newline at end of file
+  state['listener'].start()
+  state['up'] = True
+  presence.listeners += 1
@@ -0,0 +1,85 @@
+-- A module to read the memory channel published by the resolver
+
+-- Header layout: magic, layout version, generation, payload length
+local HEADER_FORMAT = "<c4I4I8I4"
+local HEADER_SIZE = 32
+local MAGIC = "WALE"
+local VERSION = 1
+
+local Channel = {
+  file_path = nil,
+  file = nil,
+  generation = 0
+}
+
+function Channel:new (file_path)
+  local o = setmetatable ({}, self)
+  self.__index = self
+
+  o.file_path = file_path
+  o.file = nil
+  o.generation = 0
+
+  return o
+end
+
+-- Reads the header returning the generation and the payload length
+function Channel:header ()
+  self.file:seek ("set", 0)
+  local header = self.file:read (HEADER_SIZE)
+
+  if header == nil or #header < HEADER_SIZE then
+    return nil
+  end
+
+  local magic, version, generation, length = string.unpack (HEADER_FORMAT, header)
+
+  if magic ~= MAGIC or version ~= VERSION then
+    return nil
+  end
+
+  return generation, length
+end
+
+-- Returns the payload only if the generation has moved, otherwise nil
+function Channel:read (retries)
+  if self.file == nil then
+    self.file = io.open (self.file_path, "rb")
+
+    if self.file == nil then
+      return nil
+    end
+  end
+
+  for _ = 1, retries or 10 do
+    local before, length = self:header ()
+
+    if before == nil or before == self.generation then
+      return nil
+    end
+
+    -- Retry only when the writer is not in the middle of an update
+    if before % 2 == 0 then
+      local payload = self.file:read (length)
+      local after = self:header ()
+
+      if before == after and payload ~= nil and #payload == length then
+        self.generation = after
+        return payload
+      end
+    end
+  end
+
+  return nil
+end
+
+function Channel:close ()
+  if self.file then
+    self.file:close ()
+    self.file = nil
+  end
+end
+
+return {
+  Channel = Channel
+}
@@ -29,8 +29,14 @@ function Logger:info (message)
   self:log (message)
 end
 
+-- Logs only in debug mode, a message given as a function is called to build
+-- the message only then, so costly messages cost nothing otherwise
 function Logger:debug (message)
   if self.debug_mode then
+    if type (message) == "function" then
+      message = message ()
+    end
+
     self:log (message)
   end
 end
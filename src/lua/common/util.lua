@@ -40,6 +40,11 @@ local function load_json (path)
   return dict
 end
 
+-- Decodes the given string json into a dictionary object
+local function parse (str)
+  return json.decode (str)
+end
+
 -- Encodes the given dictionary into a string json
 local function stringify (dict)
   return json.encode (dict)
@@ -91,6 +96,7 @@ return {
   },
   json = {
     load = load_json,
+    parse = parse,
     stringify = stringify,
     null = json.null
   },
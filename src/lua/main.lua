@@ -8,6 +8,7 @@ local ASSETS_DIR = CONFIG_DIR .. "/assets"
 local CONFIG_FILE_PATH = CONFIG_DIR .. "/config.yml"
 local LOG_FILE_PATH = CONFIG_DIR .. "/all.log"
 local DATA_FILE_PATH = CONFIG_DIR .. "/.data"
+local CHANNEL_FILE_PATH = CONFIG_DIR .. "/.channel"
 
 -- Add package paths to every lua script and module
 package.path = package.path .. ";" .. BASE_DIR .. "/?.lua"
@@ -17,6 +18,7 @@ package.path = package.path .. ";" .. BASE_DIR .. "/ui/?.lua"
 local util = require "util"
 local logging = require "logging"
 local format = require "format"
+local channel = require "channel"
 
 local Canvas = require "canvas"
 local Grid = require "grid"
@@ -29,19 +31,65 @@ local Scope = require "scope"
 
 local config = util.yaml.load (CONFIG_FILE_PATH)
 
+-- Track the config generation the resolver bumps on every reload
+local config_generation = 0
+
 -- Read debug mode from environment variables
 local debug_mode = util.to_boolean (os.getenv ("DEBUG_MODE"))
 
 local logger = logging.Logger:new (LOG_FILE_PATH, debug_mode)
 
+-- Read the handshake fifo the spawning process waits on after the first draw
+local ready_path = os.getenv ("READY_FIFO_PATH")
+
 -- Initialize the map to store the resolved data
 local data = {}
 
+-- Initialize the memory channel unless the file fallback mode is set
+local reader = nil
+
+if config["channel"] ~= "file" then
+  reader = channel.Channel:new (CHANNEL_FILE_PATH)
+end
+
+-- Reloads the config file only if the resolver has bumped its generation
+local function reload_config ()
+  if data.frame == nil or data.frame.config == config_generation then
+    return
+  end
+
+  config = util.yaml.load (CONFIG_FILE_PATH)
+  config_generation = data.frame.config
+
+  logger:debug ("config has been reloaded to generation " .. config_generation)
+end
+
+-- Loads the resolved data, returns false if nothing has been changed
+local function load_data ()
+  if reader == nil then
+    data = util.json.load (DATA_FILE_PATH)
+    reload_config ()
+    return true
+  end
+
+  -- Decode the payload only if the generation has moved
+  local payload = reader:read ()
+
+  if payload == nil then
+    return false
+  end
+
+  data = util.json.parse (payload)
+  reload_config ()
+
+  return true
+end
+
 function conky_init ()
   logger:debug ("entering initialization phase")
 
   -- Read and load the current resolved data
-  data = util.json.load (DATA_FILE_PATH)
+  load_data ()
 
   logger:debug ("initialization completed successfully")
 end
@@ -51,10 +99,12 @@ function conky_resolve ()
   logger:debug ("reading monitoring data...")
 
   -- Read and load the current resolved data
-  data = util.json.load (DATA_FILE_PATH)
-
-  logger:debug ("monitoring data has been loaded to context")
-  logger:debug ("context:\n" .. util.json.stringify (data))
+  if load_data () then
+    logger:debug ("monitoring data has been loaded to context")
+    logger:debug (function () return "context:\n" .. util.json.stringify (data) end)
+  else
+    logger:debug ("monitoring data has not been changed")
+  end
 
   logger:debug ("exiting the pre conky resolve phase")
 end
@@ -67,6 +117,11 @@ function conky_draw ()
     return
   end
 
+  if data.frame == nil then
+    logger:debug ("aborting since no data has been published yet")
+    return
+  end
+
   -- Create the ui context as a 2d canvas
   local canvas = Canvas:new (conky_window, config["dark"], config["scale"], config["offsets"])
 
@@ -81,34 +136,43 @@ function conky_draw ()
     grid:render ()
   end
 
-  -- Render the user's status component
-  local status = Status:new (canvas, {
-    avatar = ASSETS_DIR .. '/avatar.png',
-    energy = 999,
-    username = format.upper (data.static.login.user),
-    connected = data.network.conn })
-  status:locate (canvas.left, canvas.bottom)
-  status:render ()
-
-  -- Render the user's actions component
-  local actions = Actions:new (canvas, data.actions)
-  actions:locate (canvas.right, canvas.bottom)
-  actions:render ()
-
-  -- Render the timings component
-  local timings = Timings:new (canvas, { uptime = data.uptime })
-  timings:locate (canvas.center_x, canvas.top)
-  timings:render ()
-
-  -- Render the monitor component
-  local monitor = Monitor:new (canvas, {
-    cpu = data.monitor.cpu,
-    gpu = data.monitor.gpu,
-    mem = data.monitor.memory,
-    disk = data.monitor.disk
-  })
-  monitor:locate (canvas.right, canvas.top)
-  monitor:render ()
+  -- Render only the components whose resolvers are enabled
+  if data.static ~= nil then
+    -- Render the user's status component
+    local status = Status:new (canvas, {
+      avatar = ASSETS_DIR .. '/avatar.png',
+      energy = 999,
+      username = format.upper (data.static.login.user),
+      connected = data.network ~= nil and data.network.conn })
+    status:locate (canvas.left, canvas.bottom)
+    status:render ()
+  end
+
+  if data.actions ~= nil then
+    -- Render the user's actions component
+    local actions = Actions:new (canvas, data.actions)
+    actions:locate (canvas.right, canvas.bottom)
+    actions:render ()
+  end
+
+  if data.uptime ~= nil then
+    -- Render the timings component
+    local timings = Timings:new (canvas, { uptime = data.uptime })
+    timings:locate (canvas.center_x, canvas.top)
+    timings:render ()
+  end
+
+  if data.monitor ~= nil then
+    -- Render the monitor component
+    local monitor = Monitor:new (canvas, {
+      cpu = data.monitor.cpu,
+      gpu = data.monitor.gpu,
+      mem = data.monitor.memory,
+      disk = data.monitor.disk
+    })
+    monitor:locate (canvas.right, canvas.top)
+    monitor:render ()
+  end
 
   -- Render the notifier component
   local notifier = Notifier:new (canvas, {
@@ -125,5 +189,17 @@ function conky_draw ()
   -- Destroy the ui context
   canvas:dispose ()
 
+  -- Signal the spawning process once, opening read-write never blocks on a fifo
+  if ready_path ~= nil then
+    local fifo = io.open (ready_path, "r+")
+
+    if fifo ~= nil then
+      fifo:write ("ready\n")
+      fifo:close ()
+    end
+
+    ready_path = nil
+  end
+
   logger:debug ("exiting the post conky draw phase")
 end
\ No newline at end of file
@@ -2,16 +2,24 @@
 # An executable script resolving system data
 
 import argparse
+import os
 import signal
 import json
 import time
 from common import globals
-from util.logger import Router
-from resolvers import static
-from resolvers import uptime
-from resolvers import monitor
-from resolvers import network
-from listeners import keyboard, mouse
+from common import config
+from util import system
+from util import registry
+from util.logger import Router, Throttle
+from util.channel import MemoryChannel, FileChannel
+from util.scheduler import Scheduler, AsyncScheduler
+from util.history import History
+from util.journal import Journal
+from util.telemetry import Telemetry
+from util.api import Server
+from util.adaptive import Policy
+
+RESOLVERS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resolvers')
 
 # Parse command line arguments schema
 parser = argparse.ArgumentParser(prog='resolver')
@@ -20,88 +28,307 @@ parser.add_argument('--debug', dest='debug', action='store_true')
 parser.add_argument('--no-debug', dest='debug', action='store_false')
 parser.set_defaults(debug=False)
 
+parser.add_argument('--profile', dest='profile', action='store_true')
+parser.add_argument('--profile-rate', dest='profile_rate', type=int, default=100)
+parser.add_argument('--profile-window', dest='profile_window', type=int, default=60)
+
 opts = parser.parse_args()
 
-# Initialize logging router
-logger = Router('resolver', globals.LOG_FILE_PATH)
+# Initialize logging router, writing and rotating the log file on a background
+# thread and dropping any message repeated every cycle, as in debug mode
+logger = Router('resolver', globals.LOG_FILE_PATH,
+  queued=True, max_bytes=globals.LOG_MAX_SIZE, backups=globals.LOG_BACKUPS, throttle=Throttle())
 
 if opts.debug:
   logger.set_level('DEBUG')
 
-# Terminates the main and child threads
+# Sample the stacks of every thread only when asked to, costing nothing otherwise
+profiler = None
+
+if opts.profile:
+  from util.profiler import Profiler
+
+  profiler = Profiler(globals.PROFILE_FILE_PATH, opts.profile_rate, opts.profile_window, logger.disk)
+  profiler.start()
+
+  logger.disk.info(f"profiling into '{globals.PROFILE_FILE_PATH}' every {opts.profile_window} secs")
+
+# Terminates the scheduler and any threads the resolvers have started
 def shutdown (*args):
-  uptime.stop()
-  monitor.stop()
-  network.stop()
-  keyboard.stop()
-  mouse.stop()
+  for resolver in resolvers:
+    resolver.hook('stop')
 
-  state['up'] = False
+  scheduler.stop()
 
-# Attach shutdown handlers
-signal.signal(signal.SIGINT, shutdown)
-signal.signal(signal.SIGTERM, shutdown)
+# Opens the channel the data should be published through
+def open_channel (mode):
+  if mode == 'file':
+    return FileChannel(globals.DATA_FILE_PATH)
 
-state = {
-  'up': True
-}
+  return MemoryChannel(globals.CHANNEL_FILE_PATH)
+
+# Reads the sampling interval of each task, falling back to the declared ones
+def read_intervals (settings):
+  intervals = {'publish': 1}
+
+  for resolver in resolvers:
+    for name, task in resolver.tasks.items():
+      intervals[name] = task['interval']
+
+  intervals.update(settings.get('intervals') or {})
+
+  return intervals
+
+# Returns the names of the tasks worth suspending while the user is away
+def read_expensive ():
+  return [name for resolver in resolvers for name, task in resolver.tasks.items() if task.get('expensive')]
+
+# Reads the adaptive sampling settings, falling back to defaults
+def read_adaptive (settings):
+  adaptive = {
+    'enabled': True,
+    'check': 5,
+    'idle': 300,
+    'suspend': True,
+    'stretch': {
+      'idle': 4,
+      'locked': 8,
+      'battery': 2
+    }
+  }
+
+  adaptive.update(settings.get('adaptive') or {})
 
-# Resolve once the system's static information
-static.resolve()
+  return adaptive
 
-# Start monitoring system uptime, loads and network
-uptime.start()
-monitor.start()
-network.start()
+# Reads the history settings, falling back to defaults
+def read_history (settings):
+  history = {
+    'points': 60,
+    'step': 1,
+    'series': [
+      'monitor.cpu.util',
+      'monitor.cpu.temp',
+      'monitor.memory.util',
+      'monitor.gpu.util',
+      'monitor.gpu.temp',
+      'network.speeds.bytes.sent',
+      'network.speeds.bytes.recv'
+    ]
+  }
 
-# Start listening for keyboard and mouse events
-keyboard.start()
-mouse.start()
+  history.update(settings.get('history') or {})
+
+  return history
+
+# Reads the journal settings, falling back to defaults
+def read_journal (settings):
+  journal = {
+    'enabled': True,
+    'batch': 60,
+    'max_size': 16,
+    'max_age': 24,
+    'retention': 7,
+    'compressed': True
+  }
+
+  journal.update(settings.get('journal') or {})
+
+  return journal
+
+# Collects a consistent frame of the latest snapshots and publishes it
+def publish (record=True):
+  # Take every resolver's snapshot by a single reference read
+  snapshots = {resolver.key: resolver.module.state.current for resolver in resolvers}
 
-while state['up']:
   data = {}
+  samples = {}
 
-  # Read the static resolver state
-  data['static'] = static.state['data']
+  for key, snapshot in snapshots.items():
+    data[key] = snapshot.data
+    samples[key] = {
+      'seq': snapshot.seq,
+      'time': round(snapshot.time, 3)
+    }
 
-  # Read monitoring data
-  data['uptime'] = uptime.state['data']
-  data['monitor'] = monitor.state['data']
-  data['network'] = network.state['data']
+  frame['seq'] += 1
 
-  # Read keyboard and mouse actions
-  actions = {}
+  data['frame'] = {
+    'seq': frame['seq'],
+    'time': round(time.time(), 3),
+    'config': frame['config'],
+    'samples': samples
+  }
 
-  keyboard_data = keyboard.state['data']
-  mouse_data = mouse.state['data']
+  # Record the selected series and append them to the persistent journal, unless
+  # publishing out of cycle where it would record the same samples twice
+  if record:
+    history.record(data, time.monotonic())
 
-  # Calculate keyboard and mouse action rates
-  actions['strokes'] = keyboard_data['strokes']
-  actions['clicks'] = mouse_data['clicks']
-  actions['scrolls'] = mouse_data['scrolls']
-  actions['moves'] = mouse_data['moves']
+    if journal:
+      journal.append(time.time(), [history.lookup(data, column) for column in journal.columns])
 
-  actions['total'] = actions['strokes'] + actions['clicks'] + actions['scrolls'] + actions['moves']
+  data['history'] = history.last(history_settings['points'], history_settings['step'])
 
-  actions['strokes_rate'] = 0
-  actions['clicks_rate'] = 0
-  actions['scrolls_rate'] = 0
-  actions['moves_rate'] = 0
+  # Attach the resolver's own telemetry of the last cycle
+  data['resolver'] = telemetry.sample(time.monotonic())
+  data['resolver']['policy'] = policy.report()
 
-  if actions['total'] > 0:
-    actions['strokes_rate'] = actions['strokes'] / actions['total']
-    actions['clicks_rate'] = actions['clicks'] / actions['total']
-    actions['scrolls_rate'] = actions['scrolls'] / actions['total']
-    actions['moves_rate'] = actions['moves'] / actions['total']
+  payload = json.dumps(data).encode()
 
-  data['actions'] = actions
+  channel.publish(payload)
+  telemetry.sent(len(payload))
 
-  with open(globals.DATA_FILE_PATH, 'w') as data_file:
-    data_file.write(json.dumps(data))
+  # Push the frame to any api subscribers on the server's own thread
+  if server:
+    server.publish(data, payload)
+
+  # Let the spawning process know the first frame is out
+  if frame['seq'] == 1:
+    system.notify_ready()
 
   logger.disk.debug('turning into the next resolve cycle...')
 
-  # Wait before start the next cycle
-  time.sleep(1)
+# Re-reads the config file applying every setting that needs no restart
+def reload ():
+  logger.disk.info('reloading configuration settings...')
+
+  latest = config.read()
+
+  # Settings wired at startup can only be applied by a restart
+  for key in ['channel', 'runtime', 'api', 'journal']:
+    if latest.get(key) != settings.get(key):
+      logger.disk.warn(f"setting '{key}' has been changed but requires a restart")
+
+  # Enabling or disabling resolvers changes which modules are loaded
+  if latest.get('resolvers') != settings.get('resolvers'):
+    logger.disk.warn("setting 'resolvers' has been changed but requires a restart")
+
+  # Let the policy stretch the latest intervals by its current mode
+  policy.configure(read_intervals(latest), read_expensive(), read_adaptive(latest))
+
+  history_settings.update(read_history(latest))
+  history.select(history_settings['series'])
+
+  for resolver in resolvers:
+    resolver.hook('reload', latest)
+
+  settings.clear()
+  settings.update(latest)
+
+  # Bump the config generation and publish it instantly so conky reloads too
+  frame['config'] += 1
+  publish(record=False)
+
+  logger.disk.info(f"configuration settings have been reloaded to generation {frame['config']}")
+
+# Reloads the configuration on the scheduler's thread between tasks
+def hangup (*args):
+  scheduler.call_soon(reload)
+
+# Read the channel mode, falling back to memory mapped publishing
+settings = config.read()
+channel = open_channel(settings.get('channel', 'mmap'))
+
+logger.disk.info(f"publishing data via '{type(channel).__name__}'")
+
+# Serve the published data to local clients over a unix socket
+server = None
+
+if settings.get('api', True):
+  server = Server(globals.SOCKET_FILE_PATH, logger.disk)
+  server.start()
+
+  logger.disk.info(f"serving data via '{globals.SOCKET_FILE_PATH}'")
+
+# Count the published frames
+frame = {
+  'seq': 0,
+  'config': 0
+}
+
+# Keep the history of the selected series in memory
+history_settings = read_history(settings)
+history = History(history_settings['series'])
+
+# Keep the history of the selected series on disk as well
+journal_settings = read_journal(settings)
+journal = None
+
+if journal_settings['enabled']:
+  journal = Journal(
+    globals.JOURNAL_DIR,
+    history_settings['series'],
+    journal_settings['batch'],
+    journal_settings['max_size'],
+    journal_settings['max_age'],
+    journal_settings['retention'],
+    journal_settings['compressed'])
+
+# Discover every resolver, importing only the enabled ones
+resolvers = registry.select(registry.scan(RESOLVERS_DIR), settings.get('resolvers') or {}, logger.disk)
+
+for resolver in resolvers:
+  resolver.load('resolvers')
+
+logger.disk.info(f"loaded resolvers: {', '.join(resolver.name for resolver in resolvers)}")
+
+# Schedule every resolver task at its own interval on a monotonic clock
+intervals = read_intervals(settings)
+
+# Run either on the plain timer heap or on an asyncio event loop
+if settings.get('runtime', 'sync') == 'asyncio':
+  scheduler = AsyncScheduler(logger.disk)
+else:
+  scheduler = Scheduler(logger.disk)
+
+logger.disk.info(f"running tasks via '{type(scheduler).__name__}'")
+
+# Measure the resolver process and its tasks
+telemetry = Telemetry(scheduler)
+
+for resolver in resolvers:
+  for name, task in resolver.tasks.items():
+    scheduler.every(name, intervals[name], resolver.callback(task['callback']), blocking=task.get('blocking', False))
+
+# Publish right after any sample sharing the same tick
+scheduler.every('publish', intervals['publish'], publish, priority=1)
+
+# Stretch the intervals while the user is away, the screen is locked or on battery
+adaptive_settings = read_adaptive(settings)
+
+policy = Policy(scheduler, logger.disk)
+
+scheduler.every('policy', adaptive_settings['check'], policy.tick, priority=-1)
+policy.configure(intervals, read_expensive(), adaptive_settings)
+
+# Attach shutdown handlers
+signal.signal(signal.SIGINT, shutdown)
+signal.signal(signal.SIGTERM, shutdown)
+
+# Attach the config reload handler
+signal.signal(signal.SIGHUP, hangup)
+
+# Let the resolvers resolve once or start their threads
+for resolver in resolvers:
+  resolver.hook('start', settings)
+
+scheduler.run()
+
+# Flush any pending data before exiting
+channel.close()
+
+if journal:
+  journal.close()
+
+telemetry.close()
+policy.close()
+
+if server:
+  server.stop()
+
+if profiler:
+  profiler.stop()
 
-logger.disk.info('shutting down gracefully...')
\ No newline at end of file
+logger.disk.info('shutting down gracefully...')
+logger.close()
\ No newline at end of file
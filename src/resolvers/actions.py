@@ -0,0 +1,93 @@
+# A periodic resolver to calculate keyboard and mouse activity rates
+
+import time
+from util.activity import Rates, WINDOWS
+from util.convert import integer, decimal
+from util.snapshot import Buffer
+from listeners import keyboard, mouse
+
+# Listening connects to the display server and spawns two threads,
+# so this resolver is better disabled if the widget is not shown
+RESOLVER = {
+  'key': 'actions',
+  'requires': ['pynput'],
+  'tasks': {
+    'actions': {'callback': 'resolve', 'interval': 1}
+  },
+  'hooks': {
+    'start': 'start',
+    'reload': 'reload',
+    'stop': 'stop'
+  }
+}
+
+state = Buffer({
+  'strokes': 0,
+  'clicks': 0,
+  'scrolls': 0,
+  'moves': 0,
+  'total': 0,
+  'strokes_rate': 0,
+  'clicks_rate': 0,
+  'scrolls_rate': 0,
+  'moves_rate': 0,
+  'loads': {}
+})
+
+# Harvest every listener counter once per time slice
+rates = {
+  'strokes': Rates(keyboard.counters['strokes']),
+  'clicks': Rates(mouse.counters['clicks']),
+  'scrolls': Rates(mouse.counters['scrolls']),
+  'moves': Rates(mouse.counters['moves'])
+}
+
+def resolve ():
+  # Sample the pointer in case moves are not counted one by one
+  mouse.sample()
+
+  now = time.monotonic()
+
+  loads = {}
+  totals = {window: 0 for window in WINDOWS}
+
+  for name, rate in rates.items():
+    rate.update(now)
+
+    loads[name] = {}
+
+    for window, value in rate.loads.items():
+      loads[name][window] = decimal(value, 1)
+      totals[window] += value
+
+  loads['total'] = {window: decimal(value, 1) for window, value in totals.items()}
+
+  data = {}
+
+  # Report events per minute over the last minute and each kind's share
+  for name, rate in rates.items():
+    data[name] = integer(rate.loads['1m'])
+    data[name + '_rate'] = rate.loads['1m'] / totals['1m'] if totals['1m'] > 0 else 0
+
+  data['total'] = integer(totals['1m'])
+  data['loads'] = loads
+
+  state.write(data)
+
+# Starts listening for keyboard and mouse events
+def start (settings):
+  keyboard.start()
+  mouse.start((settings.get('actions') or {}).get('moves', 'count'))
+
+# Respawns the mouse listener only if the moves mode has been changed
+def reload (settings):
+  moves = (settings.get('actions') or {}).get('moves', 'count')
+
+  if moves != mouse.state['mode']:
+    mouse.stop()
+    mouse.start(moves)
+
+# Stops the keyboard and mouse listener threads
+def stop ():
+  keyboard.stop()
+  mouse.stop()
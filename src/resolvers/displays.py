@@ -0,0 +1,87 @@
+# A periodic resolver to detect monitors being plugged, unplugged or resized,
+# reconfiguring only the conky instances of the affected monitors
+
+import threading
+from common import conky
+from util.snapshot import Buffer
+
+# Polls the current screen layout, listening for xrandr events would
+# need a connection of its own to the display server
+RESOLVER = {
+  'key': 'displays',
+  'requires': ['screeninfo'],
+  'tasks': {
+    'displays': {'callback': 'resolve', 'interval': 5, 'blocking': True}
+  },
+  'hooks': {
+    'start': 'start',
+    'reload': 'reload'
+  }
+}
+
+state = Buffer({
+  'monitors': []
+})
+
+settings = {
+  'selection': [0]
+}
+
+# The layout the instances have been last reconciled with, along with the
+# thread reconciling them, if any
+layout = {
+  'signature': None,
+  'worker': None
+}
+
+# Returns the layout of the connected monitors as a comparable tuple
+def signature (connected):
+  return tuple((index, monitor.x, monitor.y, monitor.width, monitor.height) for index, monitor in connected.items())
+
+def resolve ():
+  connected = conky.monitors()
+
+  # Leave the instances alone while the display server cannot tell
+  if not connected:
+    return
+
+  latest = signature(connected)
+
+  # The first layout is the one the instances have been started with
+  if layout['signature'] is not None and latest != layout['signature']:
+    worker = layout['worker']
+
+    # Starting and stopping conky may block for secs, so reconcile off the
+    # scheduler thread, retrying on the next tick while still reconciling
+    if worker and worker.is_alive():
+      latest = layout['signature']
+    else:
+      worker = threading.Thread(target=conky.sync, args=(settings['selection'],),
+        kwargs={'wait': False, 'connected': connected}, name='displays', daemon=True)
+      worker.start()
+
+      layout['worker'] = worker
+
+  layout['signature'] = latest
+
+  instances = conky.running()
+
+  state.write({
+    'monitors': [{
+      'index': index,
+      'name': monitor.name,
+      'x': monitor.x,
+      'y': monitor.y,
+      'width': monitor.width,
+      'height': monitor.height,
+      'primary': bool(monitor.is_primary),
+      'conky': index in instances
+    } for index, monitor in connected.items()]
+  })
+
+# Reads the selected monitors, the cli reconciles the instances itself
+def reload (latest):
+  settings['selection'] = latest.get('monitors', [0])
+
+def start (latest):
+  reload(latest)
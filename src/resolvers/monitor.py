@@ -1,114 +1,276 @@
-# An asynchronous resolver to monitoring system information
+# A periodic resolver to monitoring system information
 
-import threading
-import time
+import os
 import statistics
-import psutil
-import GPUtil
 from util.convert import integer, decimal, MB
+from util.meter import Meter, Meters
+from util.topology import Topology
+from util.cores import Cores
+from util import procfs
+from util.snapshot import Buffer
 
-state = {
-  'up': False,
-  'data':{
-    'cpu': {
-      'util': 0,
-      'clock': 0,
-      'temp': 0
-    },
-    'memory': {
-      'util': 0,
-      'used': 0
-    },
-    'gpu': {
-      'util': 0,
-      'used': 0,
-      'temp': 0
-    },
-    'disk': {
-      'util': 0,
-      'used': 0,
+# Every task updates its own part of the shared snapshot, the expensive
+# ones are suspended while the user is away
+RESOLVER = {
+  'key': 'monitor',
+  'tasks': {
+    'cpu': {'callback': 'resolve_cpu', 'interval': 1},
+    'memory': {'callback': 'resolve_memory', 'interval': 1},
+    'gpu': {'callback': 'resolve_gpu', 'interval': 2, 'blocking': True, 'expensive': True},
+    'disk': {'callback': 'resolve_disk', 'interval': 30, 'blocking': True, 'expensive': True},
+    'io': {'callback': 'resolve_io', 'interval': 1}
+  }
+}
+
+state = Buffer({
+  'cpu': {
+    'util': 0,
+    'clock': 0,
+    'temp': 0,
+    'cores': {
+      'util': [],
+      'clock': []
+    }
+  },
+  'memory': {
+    'util': 0,
+    'used': 0
+  },
+  'gpu': {
+    'util': 0,
+    'used': 0,
+    'temp': 0,
+    'devices': []
+  },
+  'disk': {
+    'util': 0,
+    'used': 0,
+    'partitions': {},
+    'read': 0,
+    'write': 0,
+    'speeds': {
       'read': 0,
-      'write': 0
+      'write': 0,
+      'read_avg': 0,
+      'write_avg': 0,
+      'devices': {}
     }
   }
+})
+
+# Discover the partitions, sensors and graphics cards to read once
+topology = Topology()
+
+# Keep the hot proc and sys files open across ticks
+files = {
+  'stat': procfs.File('/proc/stat'),
+  'meminfo': procfs.File('/proc/meminfo'),
+  'diskstats': procfs.File('/proc/diskstats'),
+  'cpuinfo': None,
+  'thermals': procfs.Files(),
+  'clocks': procfs.Files()
 }
 
-def callback ():
-  while state['up']:
-    # Read processor data
-    utilization = psutil.cpu_percent()
-    clock = psutil.cpu_freq().current
+# Keep the last cpu times to calculate utilization against
+cpu_times = {
+  'busy': 0,
+  'total': 0
+}
+
+# Keep the last times of every core in preallocated arrays
+cores = Cores()
 
-    state['data']['cpu']['util'] = decimal(utilization, 1)
-    state['data']['cpu']['clock'] = integer(clock)
+# Meter system-wide and per block device io counters
+disk_meters = {
+  'read': Meter(),
+  'write': Meter()
+}
 
-    # Extract only thermals matching k10temp cpu sensors
-    thermals = psutil.sensors_temperatures()['k10temp']
+device_meters = Meters()
+
+# Converts the read and write meters into per second and smoothed speeds
+def speeds (read, write):
+  return {
+    'read': decimal(read.speed, 1),
+    'write': decimal(write.speed, 1),
+    'read_avg': decimal(read.average, 1),
+    'write_avg': decimal(write.average, 1)
+  }
 
-    if thermals:
-      temps = []
+# Returns the clock of every cpu in MHz, falling back to cpuinfo without cpufreq
+def read_clocks ():
+  clocks = files['clocks'].get(topology.clock_inputs())
 
-      # Collect only Tdie thermal data
-      for thermal in thermals:
-        if thermal.label == 'Tdie':
-          temps.append(thermal.current)
-      
-      if len(temps) > 0:
-        mean = statistics.mean(temps)
-        state['data']['cpu']['temp'] = decimal(mean, 1)
+  if len(clocks) > 0:
+    return [procfs.parse_int(*clock.read()) / 1000 for clock in clocks]
 
-    # Read memory data
-    memory = psutil.virtual_memory()
+  if files['cpuinfo'] is None:
+    files['cpuinfo'] = procfs.File('/proc/cpuinfo', 65536)
 
-    utilization = memory.percent
-    used = memory.used
+  return procfs.parse_cpuinfo_clocks(*files['cpuinfo'].read())
+
+# Reads processor utilization, clock and thermal data
+def resolve_cpu ():
+  buffer, length = files['stat'].read()
+
+  # Take user, nice, system, idle, iowait, irq, softirq and steal into account
+  times = procfs.parse_cpu_times(buffer, length)[:8]
+
+  total = sum(times)
+  busy = total - times[3] - times[4]
+
+  utilization = 0
+
+  if total > cpu_times['total']:
+    utilization = (busy - cpu_times['busy']) / (total - cpu_times['total']) * 100
+
+  cpu_times['busy'] = busy
+  cpu_times['total'] = total
+
+  clocks = read_clocks()
+
+  cpu = {
+    'util': decimal(utilization, 1),
+    'clock': integer(statistics.mean(clocks)) if clocks else 0,
+    'cores': {
+      'util': cores.update(buffer, length),
+      'clock': [integer(clock) for clock in clocks]
+    }
+  }
 
-    state['data']['memory']['util'] = decimal(utilization, 1)
-    state['data']['memory']['used'] = integer(MB(used))
+  # Read only the k10temp Tdie sensor input files
+  temps = []
 
-    # Read graphics card data
-    gpu = GPUtil.getGPUs()[0]
+  for thermal in files['thermals'].get(topology.thermal_inputs()):
+    try:
+      temps.append(procfs.parse_int(*thermal.read()) / 1000)
+    except (OSError, ValueError):
+      continue
 
-    utilization = gpu.load * 100
-    used = gpu.memoryUsed
-    temp = gpu.temperature
+  if len(temps) > 0:
+    mean = statistics.mean(temps)
+    cpu['temp'] = decimal(mean, 1)
+
+  state.update('cpu', cpu)
+
+# Reads memory data
+def resolve_memory ():
+  total, free, available, buffers, cached = procfs.parse_meminfo(*files['meminfo'].read())
+
+  # Calculate used memory the same way free and psutil do
+  used = total - free - buffers - cached
+
+  if used < 0:
+    used = total - free
+
+  utilization = (total - available) / total * 100
+
+  state.update('memory', {
+    'util': decimal(utilization, 1),
+    'used': integer(MB(used))
+  })
+
+# Reads graphics card data
+def resolve_gpu ():
+  # Skip calling GPUtil unless any graphics card has been registered
+  if topology.gpu_count() == 0:
+    return
+
+  # Import GPUtil only on machines having any graphics card
+  import GPUtil
+
+  devices = []
+
+  for gpu in GPUtil.getGPUs():
+    devices.append({
+      'util': decimal(gpu.load * 100, 1),
+      'used': integer(gpu.memoryUsed),
+      'temp': decimal(gpu.temperature, 1)
+    })
+
+  # The driver might still be loading even if cards are registered
+  if len(devices) == 0:
+    return
+
+  # Keep reporting the first card at the top level as well
+  values = dict(devices[0])
+  values['devices'] = devices
+
+  state.update('gpu', values)
+
+# Reads data from the partitions of every block device
+def resolve_disk ():
+  used = 0
+  free = 0
+
+  partitions = {}
+
+  for mountpoint in topology.mountpoints():
+    try:
+      stats = os.statvfs(mountpoint)
+    except OSError:
+      continue
+
+    partition_used = (stats.f_blocks - stats.f_bfree) * stats.f_frsize
+    partition_free = stats.f_bavail * stats.f_frsize
+
+    if partition_used + partition_free == 0:
+      continue
+
+    partitions[mountpoint] = {
+      'util': decimal(partition_used / (partition_used + partition_free) * 100, 1),
+      'used': integer(MB(partition_used))
+    }
 
-    state['data']['gpu']['util'] = decimal(utilization, 1)
-    state['data']['gpu']['used'] = integer(used)
-    state['data']['gpu']['temp'] = decimal(temp, 1)
+    used += partition_used
+    free += partition_free
 
-    # Read data from root and home disk partitions
-    partitions = psutil.disk_partitions()
+  if used + free == 0:
+    return
 
-    used = 0
-    free = 0
+  utilization = (used / (used + free)) * 100
 
-    for partition in partitions:
-      mountpoint = partition.mountpoint
+  state.update('disk', {
+    'util': decimal(utilization, 1),
+    'used': integer(MB(used)),
+    'partitions': partitions
+  })
 
-      if mountpoint == '/' or mountpoint == '/home':
-        disk = psutil.disk_usage(mountpoint)
+# Reads system-wide and per block device disk io counters
+def resolve_io ():
+  counters = {}
+  devices = topology.block_devices()
 
-        used += disk.used
-        free += disk.free
+  read = 0
+  write = 0
 
-    utilization = (used / (used + free)) * 100
+  # Keep whole block devices only, skipping partitions
+  for name, io in procfs.parse_diskstats(*files['diskstats'].read()).items():
+    if name in devices:
+      counters[name] = {
+        'read': io[0],
+        'write': io[1]
+      }
 
-    state['data']['disk']['util'] = decimal(utilization, 1)
-    state['data']['disk']['used'] = integer(MB(used))
+      read += io[0]
+      write += io[1]
 
-    io = psutil.disk_io_counters()
+  disk_meters['read'].update(read)
+  disk_meters['write'].update(write)
 
-    state['data']['disk']['read'] = integer(MB(io.read_bytes))
-    state['data']['disk']['write'] = integer(MB(io.write_bytes))
+  device_meters.update(counters)
 
-    time.sleep(1)
+  devices = {}
 
-def stop ():
-  state['up'] = False
+  for name in device_meters.names():
+    meters = device_meters.get(name)
+    devices[name] = speeds(meters['read'], meters['write'])
 
-def start ():
-  state['up'] = True
-  thread.start()
+  values = speeds(disk_meters['read'], disk_meters['write'])
+  values['devices'] = devices
 
-thread = threading.Thread(target=callback, daemon=True)
\ No newline at end of file
+  state.update('disk', {
+    'read': integer(MB(read)),
+    'write': integer(MB(write)),
+    'speeds': values
+  })
\ No newline at end of file
@@ -1,61 +1,122 @@
-# An asynchronous resolver to monitoring network information
-
-import threading
-import time
-import subprocess
-import psutil
-from util.convert import text, integer, MB
-
-state = {
-  'up': False,
-  'data':{
-    'conn': False,
-    'nic': '',
+# A periodic resolver to monitoring network information
+
+from util.convert import text, integer, decimal, MB
+from util import procfs
+from util.route import Routes
+from util.snapshot import Buffer
+from util.meter import Meters
+
+RESOLVER = {
+  'key': 'network',
+  'tasks': {
+    'network': {'callback': 'resolve', 'interval': 1}
+  }
+}
+
+state = Buffer({
+  'conn': False,
+  'nic': '',
+  'bytes': {
+    'sent': 0,
+    'recv': 0
+  },
+  'packets': {
+    'sent': 0,
+    'recv': 0
+  },
+  'speeds': {
     'bytes': {
       'sent': 0,
-      'recv': 0
+      'recv': 0,
+      'sent_avg': 0,
+      'recv_avg': 0
     },
     'packets': {
       'sent': 0,
-      'recv': 0
-    }
+      'recv': 0,
+      'sent_avg': 0,
+      'recv_avg': 0
+    },
+    'nics': {}
   }
-}
+})
+
+# Cache the active interface until the routing table changes
+routes = Routes()
+
+# Keep the network devices file open across ticks
+dev_file = procfs.File('/proc/net/dev')
+
+# Meter the io counters of every network interface
+meters = Meters()
+
+# Converts the sent and recv meters into per second and smoothed speeds
+def speeds (meters, sent, recv):
+  values = {
+    'sent': 0,
+    'recv': 0,
+    'sent_avg': 0,
+    'recv_avg': 0
+  }
+
+  if sent in meters and recv in meters:
+    values['sent'] = decimal(meters[sent].speed, 1)
+    values['recv'] = decimal(meters[recv].speed, 1)
+    values['sent_avg'] = decimal(meters[sent].average, 1)
+    values['recv_avg'] = decimal(meters[recv].average, 1)
+
+  return values
+
+# Returns the speeds of every interface and the active one
+def resolve_speeds (name, io):
+  counters = {}
+
+  for nic, (bytes_recv, packets_recv, bytes_sent, packets_sent) in io.items():
+    counters[nic] = {
+      'bytes_sent': bytes_sent,
+      'bytes_recv': bytes_recv,
+      'packets_sent': packets_sent,
+      'packets_recv': packets_recv
+    }
 
-def callback ():
-  while state['up']:
-    # Read network name and local ip via ip route
-    route = subprocess.run(
-      ['ip', 'route', 'get', '8.8.8.8'],
-      stdout=subprocess.PIPE,
-      stderr=subprocess.PIPE,
-      universal_newlines=True)
+  meters.update(counters)
 
-    if not route.stderr:
-      # Extract the name of the active network interface
-      name = route.stdout.split()[4]
+  nics = {}
 
-      state['data']['conn'] = True
-      state['data']['nic'] = text(name)
+  for nic in meters.names():
+    nics[text(nic)] = {
+      'bytes': speeds(meters.get(nic), 'bytes_sent', 'bytes_recv'),
+      'packets': speeds(meters.get(nic), 'packets_sent', 'packets_recv')
+    }
 
-      # Read system-wide io counters
-      io = psutil.net_io_counters(pernic=False)
+  active = meters.get(name)
 
-      state['data']['bytes']['sent'] = integer(MB(io.bytes_sent))
-      state['data']['bytes']['recv'] = integer(MB(io.bytes_recv))
-      state['data']['packets']['sent'] = integer(io.packets_sent)
-      state['data']['packets']['recv'] = integer(io.packets_recv)
-    else:
-      state['data']['conn'] = False
-      state['data']['nic'] = ''
+  return {
+    'bytes': speeds(active, 'bytes_sent', 'bytes_recv'),
+    'packets': speeds(active, 'packets_sent', 'packets_recv'),
+    'nics': nics
+  }
 
-    time.sleep(1)
+def resolve ():
+  # Read the name of the active network interface
+  name = routes.interface()
 
-def stop ():
-  state['up'] = False
+  # Read the io counters of every network interface
+  io = procfs.parse_net_dev(*dev_file.read())
 
-def start ():
-  state['up'] = True
-  thread.start()
+  # Sum up system-wide io counters
+  totals = [sum(counters) for counters in zip(*io.values())] or [0, 0, 0, 0]
 
-thread = threading.Thread(target=callback, daemon=True)
\ No newline at end of file
+  state.write({
+    'conn': bool(name),
+    'nic': text(name) if name else '',
+    'bytes': {
+      'sent': integer(MB(totals[2])),
+      'recv': integer(MB(totals[0]))
+    },
+    'packets': {
+      'sent': integer(totals[3]),
+      'recv': integer(totals[1])
+    },
+    'speeds': resolve_speeds(name, io)
+  })
\ No newline at end of file
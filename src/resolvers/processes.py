@@ -0,0 +1,61 @@
+# A periodic resolver to rank the top running processes by cpu, memory and io
+
+import time
+from util.convert import integer, decimal, MB
+from util.processes import Table
+from util.snapshot import Buffer
+
+RESOLVER = {
+  'key': 'processes',
+  'tasks': {
+    'processes': {'callback': 'resolve', 'interval': 2, 'expensive': True}
+  },
+  'hooks': {
+    'start': 'start',
+    'reload': 'reload'
+  }
+}
+
+# Every row of the tables holds the values of these columns
+COLUMNS = ['pid', 'name', 'cpu', 'rss', 'io']
+
+state = Buffer({
+  'count': 0,
+  'columns': COLUMNS,
+  'cpu': [],
+  'memory': [],
+  'io': []
+})
+
+settings = {
+  'top': 5
+}
+
+table = Table()
+
+# Returns the compact row of the process, having rss in MB and io in bytes/sec
+def row (process):
+  return [process.pid, process.name, decimal(process.cpu, 1), decimal(MB(process.rss), 1), integer(process.rate)]
+
+# Reads the number of rows and the open files budget
+def reload (latest):
+  values = latest.get('processes') or {}
+
+  settings['top'] = values.get('top', 5)
+  table.max_fds = values.get('max_fds', 256)
+
+def start (latest):
+  reload(latest)
+
+def resolve ():
+  table.update(time.monotonic())
+
+  n = settings['top']
+
+  state.write({
+    'count': len(table.processes),
+    'columns': COLUMNS,
+    'cpu': [row(process) for process in table.top(n, 'cpu')],
+    'memory': [row(process) for process in table.top(n, 'rss')],
+    'io': [row(process) for process in table.top(n, 'rate')]
+  })
@@ -5,51 +5,79 @@ import getpass
 import socket
 import psutil
 from util.convert import text, integer
+from util.snapshot import Buffer
 
-state = {
-  'data':{
-    'release': {
-      'name': '',
-      'version': '',
-      'codename': '',
-      'arch': ''
-    },
-    'login': {
-      'user': '',
-      'host': ''
-    },
-    'hardware': {
-      'cpu': {
-        'cores': 1,
-        'threads': 1
-      }
-    }
+# Resolve once at startup, static information never changes
+RESOLVER = {
+  'key': 'static',
+  'requires': ['psutil'],
+  'hooks': {
+    'start': 'start'
   }
 }
 
-def resolve ():
-  dist = platform.linux_distribution()
+state = Buffer({
+  'release': {
+    'name': '',
+    'version': '',
+    'codename': '',
+    'arch': ''
+  },
+  'login': {
+    'user': '',
+    'host': ''
+  },
+  'hardware': {
+    'cpu': {
+      'cores': 1,
+      'threads': 1
+    }
+  }
+})
 
-  name = dist[0]
-  version = dist[1]
-  codename = dist[2]
+# Returns the distribution name, version and codename
+def distribution ():
+  # The linux_distribution method has been removed since python 3.8
+  if hasattr(platform, 'linux_distribution'):
+    return platform.linux_distribution()
 
-  state['data']['release']['name'] = text(name)
-  state['data']['release']['version'] = text(version)
-  state['data']['release']['codename'] = text(codename)
+  try:
+    release = platform.freedesktop_os_release()
+  except (AttributeError, OSError):
+    return '', '', ''
 
-  architecture = platform.machine()
+  return release.get('NAME', ''), release.get('VERSION_ID', ''), release.get('VERSION_CODENAME', '')
 
-  state['data']['release']['arch'] = text(architecture)
+# Resolves the static information once the resolver has been loaded
+def start (settings):
+  resolve()
+
+def resolve ():
+  name, version, codename = distribution()
+
+  architecture = platform.machine()
 
   user = getpass.getuser()
   host = socket.gethostname()
 
-  state['data']['login']['user'] = text(user)
-  state['data']['login']['host'] = text(host)
-
   cores = psutil.cpu_count(logical=False)
   threads = psutil.cpu_count(logical=True)
 
-  state['data']['hardware']['cpu']['cores'] = integer(cores)
-  state['data']['hardware']['cpu']['threads'] = integer(threads)
\ No newline at end of file
+  state.write({
+    'release': {
+      'name': text(name),
+      'version': text(version),
+      'codename': text(codename),
+      'arch': text(architecture)
+    },
+    'login': {
+      'user': text(user),
+      'host': text(host)
+    },
+    'hardware': {
+      'cpu': {
+        'cores': integer(cores),
+        'threads': integer(threads)
+      }
+    }
+  })
\ No newline at end of file
@@ -0,0 +1,77 @@
+# A module exporting event counters and windowed activity rates
+
+import math
+
+# The sliding windows in secs rates are averaged over, as in load averages
+WINDOWS = {
+  '1m': 60,
+  '5m': 300,
+  '15m': 900
+}
+
+class Counter:
+  # Holds an ever growing count written by a single listener thread only
+  __slots__ = ('count',)
+
+  def __init__ (self):
+    self.count = 0
+
+class Presence:
+  # Counts input events of every listener thread, calling back once on the
+  # first event after having been armed
+  __slots__ = ('count', 'listeners', 'callback')
+
+  def __init__ (self):
+    self.count = 0
+    self.listeners = 0
+    self.callback = None
+
+  # Counts up an input event, firing any armed callback
+  def touch (self):
+    self.count += 1
+
+    callback = self.callback
+
+    if callback:
+      self.callback = None
+      callback()
+
+  # Arms the callback to be called on the next input event
+  def arm (self, callback):
+    self.callback = callback
+
+# The presence shared by the keyboard and mouse listeners
+presence = Presence()
+
+class Rates:
+  # Averages events per minute over the windows, harvesting a counter per slice
+  def __init__ (self, counter):
+    self.counter = counter
+    self.seen = 0
+    self.last = None
+    self.events = 0
+    self.loads = {window: 0 for window in WINDOWS}
+
+  # Harvests the events counted since the last slice, updating the rates
+  def update (self, now):
+    count = self.counter.count
+
+    self.events = count - self.seen
+    self.seen = count
+
+    if self.last is None:
+      self.last = now
+      return
+
+    past_secs = now - self.last
+    self.last = now
+
+    if past_secs <= 0:
+      return
+
+    rate = self.events / past_secs * 60
+
+    # Decay each load exponentially by the time passed over its window
+    for window, secs in WINDOWS.items():
+      decay = math.exp(-past_secs / secs)
+      self.loads[window] = self.loads[window] * decay + rate * (1 - decay)
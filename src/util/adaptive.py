@@ -0,0 +1,275 @@
+# A module exporting the adaptive sampling policy, stretching the task
+# intervals while the user is away, the screen is locked or on battery
+
+import os
+import time
+import subprocess
+from util import procfs
+from util.activity import presence
+
+POWER_SUPPLY_DIR = '/sys/class/power_supply'
+SESSIONS_DIR = '/run/systemd/sessions'
+
+# Standalone screen lockers running only while the screen is locked, desktop
+# lock screens like gnome's are told by the session's locked hint instead
+LOCKERS = ['i3lock', 'swaylock', 'slock', 'xsecurelock', 'xtrlock', 'xlock', 'physlock']
+
+# Returns the online files of the external power supplies and whether any battery exists
+def find_supplies (root=POWER_SUPPLY_DIR):
+  paths = []
+  battery = False
+
+  try:
+    names = sorted(os.listdir(root))
+  except OSError:
+    return paths, battery
+
+  for name in names:
+    try:
+      with open(os.path.join(root, name, 'type')) as type_file:
+        kind = type_file.read().strip()
+    except OSError:
+      continue
+
+    if kind == 'Battery':
+      battery = True
+    elif kind in ['Mains', 'USB'] and os.path.exists(os.path.join(root, name, 'online')):
+      paths.append(os.path.join(root, name, 'online'))
+
+  return paths, battery
+
+# Returns whether logind hints the given session is locked, none if it cannot tell
+def read_locked_hint (session):
+  try:
+    process = subprocess.run(
+      ['loginctl', 'show-session', session, '-p', 'LockedHint', '--value'],
+      stdout=subprocess.PIPE,
+      stderr=subprocess.DEVNULL,
+      universal_newlines=True,
+      timeout=2)
+  except (OSError, subprocess.TimeoutExpired):
+    return None
+
+  if process.returncode != 0:
+    return None
+
+  return process.stdout.strip() == 'yes'
+
+# Returns the names of the lockers in the given list currently running
+def find_lockers (lockers, buffer):
+  running = []
+
+  for entry in os.scandir('/proc'):
+    if not entry.name.isdigit():
+      continue
+
+    try:
+      buffer, length = procfs.read_once(f'/proc/{entry.name}/comm', buffer)
+    except OSError:
+      continue
+
+    name = buffer[:length].strip().decode(errors='replace')
+
+    if name in lockers:
+      running.append(name)
+
+  return running
+
+class Policy:
+  # Applies the configured intervals to the scheduler, stretched by the factor
+  # of the current mode, and suspends the expensive tasks while away
+  def __init__ (self, scheduler, logger=None):
+    self.scheduler = scheduler
+    self.logger = logger
+    self.settings = {}
+    self.intervals = {}
+    self.expensive = set()
+    self.supplies = procfs.Files()
+    self.paths, self.battery = find_supplies()
+    self.session = os.environ.get('XDG_SESSION_ID')
+    self.hinted = self.session is not None
+    self.buffer = bytearray(256)
+    self.seen = presence.count
+    self.input = time.monotonic()
+    self.time = None
+    self.mode = 'active'
+    self.factor = 1
+    self.suspended = False
+    self.ac = True
+    self.locked = False
+    self.idle = 0
+    self.skipped = 0
+    self.saved = 0
+
+  # Sets the base intervals, the expensive tasks and the policy settings
+  def configure (self, intervals, expensive, settings):
+    self.intervals = dict(intervals)
+    self.expensive = set(expensive)
+    self.settings = settings
+
+    self.evaluate()
+
+  # Returns whether the system runs on external power, desktops having no battery
+  def read_power (self):
+    if not self.battery:
+      return True
+
+    for online in self.supplies.get(self.paths):
+      if procfs.parse_int(*online.read()) == 1:
+        return True
+
+    return False
+
+  # Returns whether the session has been switched away from, asking logind
+  # whether it is locked only while quiet, as a locked screen takes no input,
+  # and scanning the processes for a standalone locker only if asked to or
+  # when the session state cannot be read
+  def read_locked (self, quiet, scan):
+    if self.session:
+      try:
+        buffer, length = procfs.read_once(os.path.join(SESSIONS_DIR, self.session), self.buffer)
+
+        if b'\nACTIVE=0' in buffer[:length]:
+          return True
+      except OSError:
+        scan = True
+    else:
+      scan = True
+
+    if quiet and self.hinted:
+      hint = read_locked_hint(self.session)
+
+      # Stop asking once logind turns out to be unreachable
+      if hint is None:
+        self.hinted = False
+      elif hint:
+        return True
+
+    if not scan:
+      return False
+
+    return len(find_lockers(self.settings.get('lockers', LOCKERS), self.buffer)) > 0
+
+  # Returns the secs since the last input event, zero if nothing is listening
+  def read_idle (self, now):
+    if presence.listeners == 0:
+      return 0
+
+    if presence.count != self.seen:
+      self.seen = presence.count
+      self.input = now
+
+    return now - self.input
+
+  # Accounts the task runs skipped since the last evaluation, estimating the
+  # cpu time saved by the last latency of each task
+  def account (self, now):
+    if self.time is None:
+      self.time = now
+      return
+
+    elapsed = now - self.time
+    self.time = now
+
+    for task in self.scheduler.tasks:
+      base = self.intervals.get(task.name)
+
+      if not base:
+        continue
+
+      runs = 0 if task.paused else elapsed / task.interval
+      skipped = elapsed / base - runs
+
+      if skipped > 0:
+        self.skipped += skipped
+        self.saved += skipped * task.latency
+
+  # Re-evaluates the mode, rescheduling the tasks whose stretched interval has changed
+  def evaluate (self):
+    now = time.monotonic()
+
+    self.account(now)
+
+    settings = self.settings
+    stretch = settings.get('stretch') or {}
+
+    mode = 'active'
+    factor = 1
+
+    if settings.get('enabled', True):
+      self.idle = self.read_idle(now)
+      self.ac = self.read_power()
+
+      away = self.idle >= settings.get('idle', 300)
+
+      # No input since the last check, or no way to tell, may mean a locked screen
+      quiet = presence.listeners == 0 or self.idle >= settings.get('check', 5)
+
+      # Scan for lockers only while the user is away, a locker needs no scan otherwise
+      self.locked = self.read_locked(quiet, away)
+
+      if self.locked:
+        mode = 'locked'
+        factor = stretch.get('locked', 8)
+      elif away:
+        mode = 'idle'
+        factor = stretch.get('idle', 4)
+
+      if not self.ac:
+        mode = 'battery' if mode == 'active' else mode
+        factor *= stretch.get('battery', 2)
+
+    suspended = mode in ['idle', 'locked'] and settings.get('suspend', True)
+
+    if mode != self.mode and self.logger:
+      self.logger.info(f"sampling turns '{mode}' with intervals stretched by {factor}")
+
+    self.mode = mode
+    self.factor = factor
+    self.suspended = suspended
+
+    self.apply()
+
+    # Snap back to the full rate on the first input event
+    if mode in ['idle', 'locked']:
+      presence.arm(lambda: self.scheduler.call_soon(self.evaluate))
+    else:
+      presence.arm(None)
+
+  # Evaluates between tasks, rescheduling during a batch of due tasks
+  # would push them twice into the heap
+  def tick (self):
+    self.scheduler.call_soon(self.evaluate)
+
+  # Reschedules every task to its stretched interval, pausing the expensive ones
+  def apply (self):
+    # Stretch the checks too, keeping them on the grid of the other tasks
+    self.scheduler.reschedule('policy', self.settings.get('check', 5) * self.factor)
+
+    for name, interval in self.intervals.items():
+      self.scheduler.reschedule(name, interval * self.factor)
+
+      if name not in self.expensive:
+        continue
+
+      if self.suspended:
+        self.scheduler.pause(name)
+      else:
+        self.scheduler.resume(name)
+
+  # Returns the current mode and the savings so far
+  def report (self):
+    return {
+      'mode': self.mode,
+      'factor': self.factor,
+      'ac': self.ac,
+      'locked': self.locked,
+      'idle': round(self.idle),
+      'suspended': sorted(self.expensive) if self.suspended else [],
+      'skipped': round(self.skipped),
+      'saved': round(self.saved, 3)
+    }
+
+  def close (self):
+    for online in self.supplies.files.values():
+      online.close()
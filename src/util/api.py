@@ -0,0 +1,343 @@
+# A module exporting the unix socket api serving snapshots and subscriptions
+# of the published data as length prefixed json frames
+
+import json
+import os
+import selectors
+import socket
+import struct
+import threading
+
+# Every frame is prefixed by its length as a big endian unsigned int
+HEADER = struct.Struct('>I')
+
+MAX_REQUEST_SIZE = 64 * 1024
+MAX_BACKLOG_SIZE = 1024 * 1024
+
+# Returns the message encoded as a length prefixed frame
+def encode (body):
+  return HEADER.pack(len(body)) + body
+
+class Peer:
+  # A connected client with its pending input and output bytes
+  def __init__ (self, sock):
+    self.sock = sock
+    self.inbox = bytearray()
+    self.outbox = bytearray()
+    self.keys = None
+    self.subscribed = False
+
+class Server:
+  # Serves the latest published data on a socket bound to the given path
+  def __init__ (self, path, logger=None):
+    self.path = path
+    self.logger = logger
+    self.peers = {}
+    self.latest = None
+    self.up = False
+
+    # Remove any socket file left behind by a crashed process
+    if os.path.exists(path):
+      os.remove(path)
+
+    self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    self.sock.bind(path)
+    os.chmod(path, 0o600)
+    self.sock.listen(8)
+    self.sock.setblocking(False)
+
+    # Publishing wakes the selector thread up through a socket pair
+    self.waker, self.wakee = socket.socketpair()
+    self.waker.setblocking(False)
+    self.wakee.setblocking(False)
+
+    self.selector = selectors.DefaultSelector()
+    self.selector.register(self.sock, selectors.EVENT_READ, self.accept)
+    self.selector.register(self.wakee, selectors.EVENT_READ, self.push)
+
+    self.thread = threading.Thread(target=self.run, name='api', daemon=True)
+
+  # Hands the published frame over to the server thread, never blocking
+  def publish (self, data, payload):
+    self.latest = (data, payload)
+
+    try:
+      self.waker.send(b'\0')
+    except (BlockingIOError, OSError):
+      # A wake up is already pending
+      pass
+
+  # Returns the latest frame filtered down to the given keys, if any
+  def frame (self, latest, keys):
+    data, payload = latest
+
+    if keys is None:
+      return payload
+
+    return json.dumps({key: data[key] for key in keys if key in data}).encode()
+
+  # Accepts any pending connections
+  def accept (self, sock, mask):
+    while True:
+      try:
+        conn, _ = sock.accept()
+      except BlockingIOError:
+        return
+
+      conn.setblocking(False)
+
+      peer = Peer(conn)
+      self.peers[conn] = peer
+      self.selector.register(conn, selectors.EVENT_READ, self.serve)
+
+  # Sends the latest frame to every subscriber
+  def push (self, wakee, mask):
+    try:
+      while wakee.recv(4096):
+        pass
+    except BlockingIOError:
+      pass
+
+    latest = self.latest
+
+    if latest is None:
+      return
+
+    # Encode once per distinct key selection across subscribers
+    frames = {}
+
+    for peer in list(self.peers.values()):
+      if not peer.subscribed:
+        continue
+
+      # A failing subscriber must not keep the rest from their frames
+      try:
+        selection = tuple(peer.keys) if peer.keys is not None else None
+
+        if selection not in frames:
+          frames[selection] = encode(self.frame(latest, peer.keys))
+
+        self.send(peer, frames[selection])
+      except Exception as exc:
+        if self.logger:
+          self.logger.trace(exc)
+
+        self.drop(peer)
+
+  # Writes any pending output and reads the peer's requests
+  def serve (self, conn, mask):
+    if mask & selectors.EVENT_WRITE:
+      self.flush(conn)
+
+    if mask & selectors.EVENT_READ and conn in self.peers:
+      self.receive(self.peers[conn])
+
+  # Reads the peer's requests, answering any complete ones
+  def receive (self, peer):
+    conn = peer.sock
+
+    try:
+      chunk = conn.recv(4096)
+    except BlockingIOError:
+      return
+    except OSError:
+      chunk = b''
+
+    if not chunk:
+      self.drop(peer)
+      return
+
+    peer.inbox += chunk
+
+    while conn in self.peers and len(peer.inbox) >= HEADER.size:
+      length = HEADER.unpack_from(peer.inbox)[0]
+
+      if length > MAX_REQUEST_SIZE:
+        self.drop(peer)
+        return
+
+      if len(peer.inbox) < HEADER.size + length:
+        break
+
+      body = bytes(peer.inbox[HEADER.size:HEADER.size + length])
+      del peer.inbox[:HEADER.size + length]
+
+      self.handle(peer, body)
+
+  # Answers a single request either with a snapshot or a subscription
+  def handle (self, peer, body):
+    try:
+      request = json.loads(body)
+      kind = request.get('type')
+      keys = request.get('keys')
+    except (ValueError, AttributeError):
+      self.send(peer, encode(json.dumps({'error': 'invalid request'}).encode()))
+      return
+
+    # Keys are looked up in the data and grouped by as a tuple, so only strings will do
+    if keys is not None and not (isinstance(keys, list) and all(isinstance(key, str) for key in keys)):
+      self.send(peer, encode(json.dumps({'error': 'keys should be a list of strings'}).encode()))
+      return
+
+    if kind == 'snapshot':
+      latest = self.latest
+
+      if latest is None:
+        self.send(peer, encode(json.dumps({'error': 'nothing published yet'}).encode()))
+      else:
+        self.send(peer, encode(self.frame(latest, keys)))
+    elif kind == 'subscribe':
+      peer.keys = keys
+      peer.subscribed = True
+    elif kind == 'unsubscribe':
+      peer.subscribed = False
+    else:
+      self.send(peer, encode(json.dumps({'error': f"unknown request type '{kind}'"}).encode()))
+
+  # Queues the frame and writes as much as the peer accepts without blocking
+  def send (self, peer, frame):
+    # Disconnect peers too slow to keep up instead of buffering forever
+    if len(peer.outbox) + len(frame) > MAX_BACKLOG_SIZE:
+      if self.logger:
+        self.logger.warn('dropping an api client too slow to keep up')
+
+      self.drop(peer)
+      return
+
+    peer.outbox += frame
+    self.flush(peer.sock)
+
+  # Writes the peer's pending output, waiting for writability if needed
+  def flush (self, conn):
+    peer = self.peers.get(conn)
+
+    if peer is None:
+      return
+
+    try:
+      sent = conn.send(peer.outbox)
+      del peer.outbox[:sent]
+    except BlockingIOError:
+      pass
+    except OSError:
+      self.drop(peer)
+      return
+
+    events = selectors.EVENT_READ | (selectors.EVENT_WRITE if peer.outbox else 0)
+
+    if self.selector.get_key(conn).events != events:
+      self.selector.modify(conn, events, self.serve)
+
+  def drop (self, peer):
+    if self.peers.pop(peer.sock, None) is None:
+      return
+
+    self.selector.unregister(peer.sock)
+    peer.sock.close()
+
+  # Serves connections until stopped
+  def run (self):
+    while self.up:
+      for key, mask in self.selector.select():
+        # Keep serving on any error, closing only the connection that caused it
+        try:
+          key.data(key.fileobj, mask)
+        except Exception as exc:
+          if self.logger:
+            self.logger.trace(exc)
+
+          peer = self.peers.get(key.fileobj)
+
+          if peer:
+            self.drop(peer)
+
+  def start (self):
+    self.up = True
+    self.thread.start()
+
+  # Stops serving, closing every connection and removing the socket file
+  def stop (self):
+    self.up = False
+
+    try:
+      self.waker.send(b'\0')
+    except OSError:
+      pass
+
+    if self.thread.is_alive():
+      self.thread.join()
+
+    for peer in list(self.peers.values()):
+      self.drop(peer)
+
+    self.selector.close()
+    self.sock.close()
+    self.waker.close()
+    self.wakee.close()
+
+    if os.path.exists(self.path):
+      os.remove(self.path)
+
+class Client:
+  # Connects to the api socket of the given path
+  def __init__ (self, path):
+    self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+      self.sock.connect(path)
+    except OSError:
+      self.sock.close()
+      raise Exception(f"[Errno 111] Unable to connect to api socket: '{path}'")
+
+  # Reads exactly the given number of bytes
+  def read (self, size):
+    data = bytearray()
+
+    while len(data) < size:
+      chunk = self.sock.recv(size - len(data))
+
+      if not chunk:
+        raise Exception('[Errno 104] Api connection closed by the resolver')
+
+      data += chunk
+
+    return data
+
+  # Sends the request as a frame
+  def request (self, kind, keys=None):
+    body = {'type': kind}
+
+    if keys is not None:
+      body['keys'] = keys
+
+    self.sock.sendall(encode(json.dumps(body).encode()))
+
+  # Blocks until the next frame arrives, returning it decoded
+  def receive (self):
+    length = HEADER.unpack(self.read(HEADER.size))[0]
+    message = json.loads(self.read(length))
+
+    if isinstance(message, dict) and set(message) == {'error'}:
+      raise Exception(f"[Errno 22] Api request failed: {message['error']}")
+
+    return message
+
+  # Returns the latest published data, filtered down to the given keys
+  def snapshot (self, keys=None):
+    self.request('snapshot', keys)
+
+    return self.receive()
+
+  # Subscribes returning an iterator of every published frame, filtered down to the given keys
+  def subscribe (self, keys=None):
+    self.request('subscribe', keys)
+
+    return self.frames()
+
+  # Yields every frame pushed to the subscription
+  def frames (self):
+    while True:
+      yield self.receive()
+
+  def close (self):
+    self.sock.close()
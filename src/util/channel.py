@@ -0,0 +1,133 @@
+# A module exporting channels to publish data between processes
+
+import os
+import mmap
+import struct
+
+# Header layout: magic, layout version, generation, payload length
+HEADER = struct.Struct('<4sIQI12x')
+MAGIC = b'WALE'
+VERSION = 1
+
+class MemoryChannel:
+  # Maps the given file into memory as a seqlock publish buffer
+  def __init__ (self, path, capacity=65536):
+    self.path = path
+    self.generation = 0
+
+    self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    self.size = HEADER.size + capacity
+
+    os.ftruncate(self.fd, self.size)
+    self.buffer = mmap.mmap(self.fd, self.size)
+
+    HEADER.pack_into(self.buffer, 0, MAGIC, VERSION, self.generation, 0)
+
+  # Writes the given payload in place, bumping the generation around it
+  def publish (self, payload):
+    length = len(payload)
+
+    # Grow the mapping in case the payload does not fit in
+    if HEADER.size + length > self.size:
+      self.resize(HEADER.size + length * 2)
+
+    # An odd generation marks the payload as being written
+    self.generation += 1
+    HEADER.pack_into(self.buffer, 0, MAGIC, VERSION, self.generation, length)
+
+    self.buffer[HEADER.size:HEADER.size + length] = payload
+
+    # An even generation marks the payload as consistent
+    self.generation += 1
+    HEADER.pack_into(self.buffer, 0, MAGIC, VERSION, self.generation, length)
+
+    return self.generation
+
+  # Extends both the backing file and the mapping to the given size
+  def resize (self, size):
+    self.buffer.resize(size)
+    self.size = size
+
+  def close (self):
+    self.buffer.close()
+    os.close(self.fd)
+
+class FileChannel:
+  # Publishes the payload as a regular file, used as a fallback mode
+  def __init__ (self, path):
+    self.path = path
+    self.generation = 0
+
+  # Writes the payload into a temp file and renames it atomically
+  def publish (self, payload):
+    temp_path = self.path + '.tmp'
+
+    with open(temp_path, 'wb') as temp_file:
+      temp_file.write(payload)
+
+    os.replace(temp_path, self.path)
+
+    self.generation += 2
+
+    return self.generation
+
+  def close (self):
+    pass
+
+class Reader:
+  # Opens the memory channel file with the given path for reading
+  def __init__ (self, path):
+    self.path = path
+    self.fd = os.open(path, os.O_RDONLY)
+    self.size = 0
+    self.buffer = None
+    self.generation = 0
+
+  # Maps the whole file, remapping whenever the writer has grown it
+  def remap (self):
+    size = os.fstat(self.fd).st_size
+
+    if size != self.size:
+      if self.buffer:
+        self.buffer.close()
+
+      self.buffer = mmap.mmap(self.fd, size, prot=mmap.PROT_READ)
+      self.size = size
+
+  # Returns the generation and payload, or none if nothing has changed
+  def read (self, retries=100):
+    if self.buffer is None:
+      self.remap()
+
+    for _ in range(retries):
+      magic, version, before, length = HEADER.unpack_from(self.buffer, 0)
+
+      if magic != MAGIC or version != VERSION:
+        raise Exception(f"[Errno 22] Invalid channel file: '{self.path}'")
+
+      if before == self.generation:
+        return None
+
+      # Retry while the writer is in the middle of an update
+      if before % 2 == 1:
+        continue
+
+      if HEADER.size + length > self.size:
+        self.remap()
+        continue
+
+      payload = self.buffer[HEADER.size:HEADER.size + length]
+
+      after = HEADER.unpack_from(self.buffer, 0)[2]
+
+      if before == after:
+        self.generation = after
+        return after, payload
+
+    return None
+
+  def close (self):
+    if self.buffer:
+      self.buffer.close()
+
+    os.close(self.fd)
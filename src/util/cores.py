@@ -0,0 +1,108 @@
+# A module exporting the per core cpu utilization sampler, vectorized
+# with numpy when it is installed and with plain arrays otherwise
+
+from array import array
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+# Columns of user, nice, system, idle, iowait, irq, softirq and steal times
+COLUMNS = 8
+IDLE = 3
+IOWAIT = 4
+
+# Returns the per core lines of the stat file split into tokens
+def split_cores (buffer, length):
+  start = buffer.find(b'\ncpu0 ', 0, length) + 1
+
+  if start == 0:
+    return [], 0
+
+  # Every per core line starts with cpu, the first following line does not
+  end = start
+
+  while buffer.startswith(b'cpu', end):
+    end = buffer.find(b'\n', end, length) + 1
+
+    if end == 0:
+      end = length
+      break
+
+  # Kernels report a varying number of columns, count them on the first line
+  width = len(buffer[start:buffer.find(b'\n', start, length)].split())
+
+  return buffer[start:end].split(), width
+
+class Cores:
+  # Keeps the last busy and total times of every core in preallocated arrays
+  def __init__ (self, vectorized=True):
+    self.vectorized = vectorized and numpy is not None
+    self.count = 0
+    self.busy = None
+    self.total = None
+
+  # Allocates the arrays for the given number of cores
+  def allocate (self, count):
+    self.count = count
+
+    if self.vectorized:
+      self.busy = numpy.zeros(count, dtype=numpy.int64)
+      self.total = numpy.zeros(count, dtype=numpy.int64)
+    else:
+      self.busy = array('q', bytes(8 * count))
+      self.total = array('q', bytes(8 * count))
+
+  # Returns the utilization percentage of every core since the last update
+  def update (self, buffer, length):
+    tokens, width = split_cores(buffer, length)
+
+    if width == 0:
+      return []
+
+    count = len(tokens) // width
+
+    # Cores going online or offline reset every delta
+    if count != self.count:
+      self.allocate(count)
+
+    if self.vectorized:
+      try:
+        return self.update_numpy(tokens, width, count)
+      except Exception:
+        # Keep sampling with plain arrays rather than failing every tick
+        self.vectorized = False
+        self.allocate(count)
+
+    return self.update_arrays(tokens, width, count)
+
+  def update_numpy (self, tokens, width, count):
+    # Tokens are byte strings of varying lengths, turn every column into ints first
+    times = numpy.array([list(map(int, tokens[k::width])) for k in range(1, COLUMNS + 1)], dtype=numpy.int64)
+
+    total = times.sum(axis=0)
+    busy = total - times[IDLE] - times[IOWAIT]
+
+    elapsed = total - self.total
+    utils = numpy.where(elapsed > 0, (busy - self.busy) * 100 / numpy.maximum(elapsed, 1), 0)
+
+    self.busy = busy
+    self.total = total
+
+    return utils.round(1).tolist()
+
+  def update_arrays (self, tokens, width, count):
+    # Take every column of all cores at once by striding over the tokens
+    columns = [array('q', map(int, tokens[k::width])) for k in range(1, COLUMNS + 1)]
+
+    total = array('q', map(sum, zip(*columns)))
+    busy = array('q', [t - i - w for t, i, w in zip(total, columns[IDLE], columns[IOWAIT])])
+
+    utils = [round((b - lb) * 100 / (t - lt), 1) if t > lt else 0
+      for b, lb, t, lt in zip(busy, self.busy, total, self.total)]
+
+    self.busy = busy
+    self.total = total
+
+    return utils
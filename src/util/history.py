@@ -0,0 +1,122 @@
+# A module exporting fixed size ring buffers to keep the history of metrics
+#
+# Every series keeps three resolutions of single precision floats, 1s points
+# for 5 mins, 10s points for 1 hour and 1 min points for 24 hours, that is
+# (300 + 360 + 1440) * 4 bytes = 8400 bytes per series at most.
+
+import math
+from array import array
+
+# The resolution tiers given as step secs and number of points
+TIERS = ((1, 300), (10, 360), (60, 1440))
+
+class Ring:
+  def __init__ (self, size):
+    self.size = size
+    self.values = array('f', [math.nan]) * size
+    self.index = 0
+    self.count = 0
+
+  # Writes the value over the oldest one
+  def push (self, value):
+    self.values[self.index] = value
+    self.index = (self.index + 1) % self.size
+    self.count = min(self.count + 1, self.size)
+
+  # Returns the last n values ordered from the oldest to the newest
+  def last (self, n):
+    n = min(n, self.count)
+
+    start = (self.index - n) % self.size
+
+    if start + n <= self.size:
+      return self.values[start:start + n].tolist()
+
+    return (self.values[start:] + self.values[:self.index]).tolist()
+
+class Tier:
+  # Rolls values up into buckets of the given step secs
+  def __init__ (self, step, size):
+    self.step = step
+    self.ring = Ring(size)
+    self.bucket = None
+    self.total = 0
+    self.count = 0
+
+  def add (self, value, now):
+    bucket = math.floor(now / self.step)
+
+    if self.bucket is None:
+      self.bucket = bucket
+
+    if bucket != self.bucket:
+      # Close the current bucket pushing the mean of its values
+      self.ring.push(self.total / self.count if self.count > 0 else math.nan)
+
+      # Mark any skipped buckets as gaps
+      for _ in range(min(bucket - self.bucket - 1, self.ring.size)):
+        self.ring.push(math.nan)
+
+      self.bucket = bucket
+      self.total = 0
+      self.count = 0
+
+    if value is not None:
+      self.total += value
+      self.count += 1
+
+class Series:
+  def __init__ (self, tiers=TIERS):
+    self.tiers = [Tier(step, size) for step, size in tiers]
+
+  def add (self, value, now):
+    for tier in self.tiers:
+      tier.add(value, now)
+
+  # Returns the last n points of the tier with the given step
+  def last (self, n, step=1):
+    for tier in self.tiers:
+      if tier.step == step:
+        return tier.ring.last(n)
+
+    raise Exception(f'[Errno 22] Invalid history step: {step}')
+
+class History:
+  # Keeps a series for each of the given dotted paths into the data
+  def __init__ (self, paths, tiers=TIERS):
+    self.tiers = tiers
+    self.series = {}
+
+    self.select(paths)
+
+  # Keeps only the series of the given paths, holding on to any recorded ones
+  def select (self, paths):
+    self.series = {path: self.series.get(path) or Series(self.tiers) for path in paths}
+
+  # Returns the value the dotted path points to or none if missing
+  def lookup (self, data, path):
+    for key in path.split('.'):
+      if not isinstance(data, dict) or key not in data:
+        return None
+
+      data = data[key]
+
+    if isinstance(data, bool) or not isinstance(data, (int, float)):
+      return None
+
+    return data
+
+  # Records the current value of every series found in the data
+  def record (self, data, now):
+    for path, series in self.series.items():
+      series.add(self.lookup(data, path), now)
+
+  # Returns the last n points of every series, having gaps as none
+  def last (self, n, step=1):
+    points = {}
+
+    for path, series in self.series.items():
+      values = series.last(n, step)
+      points[path] = [None if math.isnan(v) else round(v, 2) for v in values]
+
+    return points
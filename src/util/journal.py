@@ -0,0 +1,251 @@
+# A module exporting an append only binary log of metric records
+#
+# A journal is a directory of segment files, each starting with a header of
+# the magic, layout version, column count and header size followed by the
+# column names, and then fixed size records of a double timestamp plus a
+# single precision float per column. Sealed segments are optionally gzipped.
+
+import os
+import re
+import gzip
+import math
+import mmap
+import time
+import struct
+import threading
+
+HEADER = struct.Struct('<4sIII')
+MAGIC = b'WLOG'
+VERSION = 1
+
+SEGMENT_PATTERN = re.compile(r'^(\d+)\.log(\.gz)?$')
+
+# Returns the struct of a record with the given number of columns
+def record_struct (columns):
+  return struct.Struct('<d' + 'f' * columns)
+
+# Packs the segment header given the column names
+def pack_header (columns):
+  names = '\n'.join(columns).encode()
+
+  # Align records to 8 bytes right after the header
+  size = HEADER.size + len(names)
+  size += (8 - size % 8) % 8
+
+  header = bytearray(size)
+  HEADER.pack_into(header, 0, MAGIC, VERSION, len(columns), size)
+  header[HEADER.size:HEADER.size + len(names)] = names
+
+  return bytes(header)
+
+# Unpacks the segment header into the column names and the header size
+def unpack_header (buffer):
+  magic, version, count, size = HEADER.unpack_from(buffer, 0)
+
+  if magic != MAGIC or version != VERSION:
+    raise Exception('[Errno 22] Invalid journal segment')
+
+  names = bytes(buffer[HEADER.size:size]).rstrip(b'\0').decode()
+  columns = names.split('\n') if count > 0 else []
+
+  return columns, size
+
+# Lists the segment files as start time and path pairs, oldest first
+def segments (directory):
+  if not os.path.exists(directory):
+    return []
+
+  result = {}
+
+  for name in os.listdir(directory):
+    match = SEGMENT_PATTERN.match(name)
+
+    # Prefer the plain segment while it is still being compressed
+    if match and not (match.group(2) and int(match.group(1)) in result):
+      result[int(match.group(1))] = os.path.join(directory, name)
+
+  return sorted(result.items())
+
+# Compresses a sealed segment file, replacing it with the gzipped one
+def compress (path):
+  with open(path, 'rb') as segment_file:
+    with gzip.open(path + '.gz.tmp', 'wb') as gzip_file:
+      gzip_file.write(segment_file.read())
+
+  os.replace(path + '.gz.tmp', path + '.gz')
+  os.remove(path)
+
+class Journal:
+  def __init__ (self, directory, columns, batch=60, max_size=16, max_age=24, retention=7, compressed=True):
+    self.directory = directory
+    self.columns = list(columns)
+    self.record = record_struct(len(self.columns))
+    self.batch = batch
+    self.max_size = max_size * 1024 ** 2
+    self.max_age = max_age * 3600
+    self.retention = retention * 86400
+    self.compressed = compressed
+
+    self.buffer = bytearray()
+    self.pending = 0
+    self.fd = None
+    self.path = None
+    self.start = 0
+    self.size = 0
+
+    os.makedirs(self.directory, exist_ok=True)
+
+  # Opens a new segment starting at the given time
+  def open (self, now):
+    self.start = int(now)
+    self.path = os.path.join(self.directory, f'{self.start}.log')
+
+    header = pack_header(self.columns)
+
+    self.fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o644)
+    os.write(self.fd, header)
+
+    self.size = len(header)
+
+  # Seals the current segment compressing it in the background
+  def seal (self):
+    self.flush()
+
+    os.close(self.fd)
+    self.fd = None
+
+    if self.compressed:
+      threading.Thread(target=compress, args=(self.path,), daemon=True).start()
+
+    self.expire()
+
+  # Removes any segments older than the retention period
+  def expire (self):
+    limit = time.time() - self.retention
+
+    for start, path in segments(self.directory):
+      if start < limit and path != self.path:
+        os.remove(path)
+
+  # Buffers a record of the given values, having none as gaps
+  def append (self, timestamp, values):
+    if self.fd is None:
+      self.open(timestamp)
+    elif self.size >= self.max_size or timestamp - self.start >= self.max_age:
+      self.seal()
+      self.open(timestamp)
+
+    values = [math.nan if value is None else value for value in values]
+
+    self.buffer += self.record.pack(timestamp, *values)
+    self.pending += 1
+
+    if self.pending >= self.batch:
+      self.flush()
+
+  # Writes any buffered records to the segment in a single call
+  def flush (self):
+    if self.fd is None or not self.buffer:
+      return
+
+    os.write(self.fd, self.buffer)
+
+    self.size += len(self.buffer)
+    self.buffer = bytearray()
+    self.pending = 0
+
+  def close (self):
+    if self.fd is not None:
+      self.flush()
+      os.close(self.fd)
+      self.fd = None
+
+class Segment:
+  # Maps the segment with the given path, decompressing gzipped ones
+  def __init__ (self, path):
+    self.map = None
+
+    if path.endswith('.gz'):
+      with gzip.open(path, 'rb') as gzip_file:
+        self.buffer = memoryview(gzip_file.read())
+    else:
+      with open(path, 'rb') as segment_file:
+        self.map = mmap.mmap(segment_file.fileno(), 0, prot=mmap.PROT_READ)
+
+      self.buffer = memoryview(self.map)
+
+    self.columns, self.offset = unpack_header(self.buffer)
+    self.record = record_struct(len(self.columns))
+
+    # Ignore any trailing partial record still being written
+    self.count = (len(self.buffer) - self.offset) // self.record.size
+
+  # Returns the timestamp of the record with the given index
+  def timestamp (self, index):
+    return struct.unpack_from('<d', self.buffer, self.offset + index * self.record.size)[0]
+
+  # Returns the index of the first record not older than the given time
+  def bisect (self, since):
+    low, high = 0, self.count
+
+    while low < high:
+      middle = (low + high) // 2
+
+      if self.timestamp(middle) < since:
+        low = middle + 1
+      else:
+        high = middle
+
+    return low
+
+  # Yields timestamp and value pairs of the given column within the range
+  def query (self, column, since, until):
+    if column not in self.columns:
+      return
+
+    index = self.columns.index(column) + 1
+
+    first = self.bisect(since)
+    last = self.bisect(until)
+
+    start = self.offset + first * self.record.size
+    end = self.offset + last * self.record.size
+
+    for values in self.record.iter_unpack(self.buffer[start:end]):
+      if not math.isnan(values[index]):
+        yield values[0], values[index]
+
+  def close (self):
+    self.buffer.release()
+
+    if self.map:
+      self.map.close()
+
+# Returns the timestamp and value pairs of the column within the given range
+def query (directory, column, since, until=None):
+  if until is None:
+    until = time.time()
+
+  points = []
+  files = segments(directory)
+
+  for i, (start, path) in enumerate(files):
+    # Skip segments starting after the range or ending before it
+    if start >= until:
+      break
+
+    if i + 1 < len(files) and files[i + 1][0] <= since:
+      continue
+
+    # Skip segments having not even their header written
+    if os.path.getsize(path) == 0:
+      continue
+
+    segment = Segment(path)
+
+    try:
+      points.extend(segment.query(column, since, until))
+    finally:
+      segment.close()
+
+  return points
@@ -1,31 +1,103 @@
 # A module exporting the logging router class
 
 import sys
+import time
+import atexit
+import queue
 import logging
 from logging import StreamHandler, FileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+class Throttle:
+  # Lets at most burst calls of the same message through per window secs,
+  # noting how many have been dropped on the first one let through again
+  def __init__ (self, window=60, burst=5, size=1024):
+    self.window = window
+    self.burst = burst
+    self.size = size
+    self.counts = {}
+
+  # Returns the message to log, none if it should be dropped
+  def check (self, level, message):
+    key = (level, message)
+    now = time.monotonic()
+
+    entry = self.counts.get(key)
+
+    if entry is None or now - entry[0] >= self.window:
+      # Forget the messages of past windows before the counts grow unbounded
+      if entry is None and len(self.counts) >= self.size:
+        self.counts = {k: e for k, e in self.counts.items() if now - e[0] < self.window}
+
+      self.counts[key] = [now, 1, 0]
+
+      if entry and entry[2] > 0:
+        return f'{message} (repeated {entry[2]} more times)'
+
+      return message
+
+    if entry[1] < self.burst:
+      entry[1] += 1
+      return message
+
+    entry[2] += 1
+
+    return None
+
+class Queue(QueueHandler):
+  # Formats the record in place rather than in a copy, as no other handler shares it
+  def prepare (self, record):
+    record.msg = self.format(record)
+    record.args = None
+    record.exc_info = None
+    record.exc_text = None
+    record.stack_info = None
+
+    return record
 
 class Route:
-  def __init__ (self, scope, name, handler, level):
+  def __init__ (self, scope, name, handler, level, throttle=None):
     self.scope = scope
+    self.prefix = scope + ': '
+    self.throttle = throttle
     self.logger = logging.getLogger(name)
     self.logger.addHandler(handler)
     self.logger.setLevel(level)
 
-  def info (self, message):
-    self.logger.info(f'{self.scope}: {message}')
+  # Logs the message formatted with its args only if the level is enabled and
+  # the throttle lets it through, so costly values should be passed as args
+  def log (self, level, message, args):
+    if not self.logger.isEnabledFor(level):
+      return False
 
-  def warn (self, message):
-    self.logger.warning(f'{self.scope}: {message}')
+    message = self.prefix + str(message)
 
-  def debug (self, message):
-    self.logger.debug(f'{self.scope}: {message}')
+    if self.throttle:
+      message = self.throttle.check(level, message)
 
-  def error (self, message):
-    self.logger.error(f'{self.scope}: {message}')
+      if message is None:
+        return False
 
+    self.logger.log(level, message, *args)
+
+    return True
+
+  def info (self, message, *args):
+    self.log(logging.INFO, message, args)
+
+  def warn (self, message, *args):
+    self.log(logging.WARNING, message, args)
+
+  def debug (self, message, *args):
+    self.log(logging.DEBUG, message, args)
+
+  def error (self, message, *args):
+    self.log(logging.ERROR, message, args)
+
+  # Logs the error along with its traceback, throttled as a single message
   def trace (self, error):
-    self.error(error)
-    self.logger.exception(error)
+    if self.log(logging.ERROR, error, ()):
+      self.logger.exception(error)
 
   def set_level (self, level):
     self.logger.setLevel(level)
@@ -34,15 +106,41 @@ class Route:
       handler.setLevel(level)
 
 class Router:
-  def __init__ (self, scope, filepath):
+  # Routes to stdout, stderr and the log file, writing the file either in place or
+  # through a queue drained by a background thread, rotating it once it has
+  # grown over max_bytes and dropping repeated messages if a throttle is given
+  def __init__ (self, scope, filepath, queued=False, max_bytes=0, backups=3, throttle=None):
     self.stdout = Route(scope, scope + '.stdout', StreamHandler(sys.stdout), 'INFO')
     self.stderr = Route(scope, scope + '.stderr', StreamHandler(sys.stderr), 'ERROR')
+    self.disk = None
+    self.listener = None
 
     if filepath:
-      self.disk = Route(scope, scope + '.disk', FileHandler(filepath), 'INFO')
+      if max_bytes > 0:
+        handler = RotatingFileHandler(filepath, maxBytes=max_bytes, backupCount=backups)
+      else:
+        handler = FileHandler(filepath)
+
+      # Keep the callers off disk io, the listener thread writes instead
+      if queued:
+        self.listener = QueueListener(queue.SimpleQueue(), handler)
+        self.listener.start()
+
+        # Flush the queue even if the process exits on an error
+        atexit.register(self.close)
+
+        handler = Queue(self.listener.queue)
+
+      self.disk = Route(scope, scope + '.disk', handler, 'INFO', throttle)
 
   def set_level (self, level):
     self.stdout.set_level(level)
 
     if self.disk:
-      self.disk.set_level(level)
\ No newline at end of file
+      self.disk.set_level(level)
+
+  # Writes any queued records and stops the listener thread
+  def close (self):
+    if self.listener:
+      self.listener.stop()
+      self.listener = None
@@ -1,29 +1,92 @@
-# A utility module to expose a speed metering class
+# A utility module to expose speed metering classes
 
-from datetime import datetime
+import math
+import time
 
 class Meter:
 
-  def __init__ (self):
-    self.value = 0
-    self.last = datetime.now()
-  
-  def update (self, value):
-    now = datetime.now()
+  def __init__ (self, window=10, bits=64):
+    self.window = window
+    self.wrap = 2 ** bits
+    self.reset()
 
-    past_secs = (now - self.last).total_seconds()
+  def update (self, value, now=None):
+    if now is None:
+      now = time.monotonic()
 
-    # Calculate the current speed, taking care of extreme values
-    if self.value == 0 or self.value >= value or past_secs <= 0:
-      self.speed = 0
-    else:
-      delta = value - self.value
-      self.speed = delta / past_secs
+    # Take the first value as the base to measure speeds against
+    if self.value is None:
+      self.value = value
+      self.last = now
+      return
+
+    past_secs = now - self.last
+
+    if past_secs <= 0:
+      return
+
+    delta = value - self.value
+
+    # Decide whether a decreasing counter has wrapped around or reset
+    if delta < 0:
+      if self.value >= self.wrap * 0.75 and value < self.wrap:
+        delta += self.wrap
+      else:
+        delta = 0
+
+    self.speed = delta / past_secs
+
+    # Smooth the speed by an exponential moving average over the window
+    alpha = 1 - math.exp(-past_secs / self.window)
+    self.average += alpha * (self.speed - self.average)
 
     # Restore new values
     self.value = value
     self.last = now
 
   def reset (self):
-    self.value = 0
-    self.last = datetime.now()
\ No newline at end of file
+    self.value = None
+    self.last = None
+    self.speed = 0
+    self.average = 0
+
+class Meters:
+  # Holds a meter per device and counter, following devices coming and going
+  def __init__ (self, window=10, bits=64):
+    self.window = window
+    self.bits = bits
+    self.meters = {}
+
+  # Updates the meters given the counters of each device by name
+  def update (self, counters, now=None):
+    if now is None:
+      now = time.monotonic()
+
+    # Drop meters of any unplugged devices
+    for name in list(self.meters):
+      if name not in counters:
+        del self.meters[name]
+
+    for name, values in counters.items():
+      meters = self.meters.get(name)
+
+      # Start metering newly plugged devices
+      if meters is None:
+        meters = {}
+        self.meters[name] = meters
+
+      for key, value in values.items():
+        meter = meters.get(key)
+
+        if meter is None:
+          meter = Meter(self.window, self.bits)
+          meters[key] = meter
+
+        meter.update(value, now)
+
+  # Returns the meters of the device with the given name
+  def get (self, name):
+    return self.meters.get(name, {})
+
+  def names (self):
+    return list(self.meters)
@@ -0,0 +1,41 @@
+# A module exporting non blocking netlink subscriptions to kernel notifications
+
+import socket
+
+NETLINK_ROUTE = 0
+NETLINK_KOBJECT_UEVENT = 15
+
+# Receive into a reusable buffer, so an empty drain allocates nothing
+buffer = bytearray(65536)
+
+# Opens a non blocking netlink socket joined to the given multicast groups
+def subscribe (protocol, groups):
+  try:
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, protocol)
+    sock.bind((0, groups))
+    sock.setblocking(False)
+  except (AttributeError, OSError):
+    return None
+
+  return sock
+
+# Reads every pending message, having none in the list if any were lost
+def drain (sock):
+  messages = []
+
+  while True:
+    try:
+      length = sock.recv_into(buffer)
+
+      if not length:
+        break
+
+      messages.append(bytes(buffer[:length]))
+    except BlockingIOError:
+      break
+    except OSError:
+      # The socket buffer has been overrun, so some messages are lost
+      messages.append(None)
+      break
+
+  return messages
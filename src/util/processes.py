@@ -0,0 +1,147 @@
+# A module exporting the incremental table of running processes
+
+import heapq
+import os
+from util import procfs
+
+TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+class Process:
+  # Keeps the last counters of a process to calculate rates against
+  __slots__ = ('pid', 'name', 'stat', 'io', 'readable', 'ticks', 'bytes', 'cpu', 'rss', 'rate', 'seen')
+
+  def __init__ (self, pid):
+    self.pid = pid
+    self.name = None
+    self.stat = None
+    self.io = None
+    self.readable = True
+    self.ticks = None
+    self.bytes = None
+    self.cpu = 0
+    self.rss = 0
+    self.rate = 0
+    self.seen = 0
+
+  # Closes any files kept open, returning how many have been released
+  def close (self):
+    count = 0
+
+    for file in (self.stat, self.io):
+      if file:
+        file.close()
+        count += 1
+
+    self.stat = self.io = None
+
+    return count
+
+class Table:
+  # Tracks every running process, keeping at most max_fds files open
+  def __init__ (self, max_fds=256):
+    self.max_fds = max_fds
+    self.fds = 0
+    self.processes = {}
+    self.buffer = bytearray(1024)
+    self.time = None
+    self.tick = 0
+
+  # Reads the given file of the process, through its open file if any
+  def read (self, process, kind):
+    file = getattr(process, kind)
+
+    if file:
+      return file.read()
+
+    path = f'/proc/{process.pid}/{kind}'
+
+    # Keep the file open only while the budget allows
+    if self.fds < self.max_fds:
+      file = procfs.File(path, 1024)
+      setattr(process, kind, file)
+      self.fds += 1
+
+      return file.read()
+
+    return procfs.read_once(path, self.buffer)
+
+  # Samples the process returning false if it has exited
+  def sample (self, process, elapsed):
+    try:
+      buffer, length = self.read(process, 'stat')
+    except (FileNotFoundError, ProcessLookupError):
+      return False
+
+    if process.name is None:
+      process.name = procfs.parse_process_comm(buffer, length)
+
+    ticks, threads, pages = procfs.parse_process_stat(buffer, length)
+
+    # Most processes sleep, a process not scheduled since the last tick
+    # has done no io either, so skip reading its io file
+    idle = ticks == process.ticks and process.bytes is not None
+
+    # A lower count means the pid has been reused by a new process
+    if process.ticks is not None and ticks >= process.ticks and elapsed:
+      process.cpu = (ticks - process.ticks) / TICKS / elapsed * 100
+    else:
+      process.cpu = 0
+
+    process.ticks = ticks
+    process.rss = pages * PAGE_SIZE
+
+    if idle:
+      process.rate = 0
+
+    # Other users' io files are not readable, stop trying after the first time
+    elif process.readable:
+      try:
+        total = sum(procfs.parse_process_io(*self.read(process, 'io')))
+
+        if process.bytes is not None and total >= process.bytes and elapsed:
+          process.rate = (total - process.bytes) / elapsed
+        else:
+          process.rate = 0
+
+        process.bytes = total
+      except PermissionError:
+        process.readable = False
+      except (FileNotFoundError, ProcessLookupError):
+        return False
+
+    return True
+
+  # Samples every live process, forgetting the ones that have exited
+  def update (self, now):
+    self.tick += 1
+    elapsed = now - self.time if self.time is not None else 0
+    self.time = now
+
+    for entry in os.scandir('/proc'):
+      if not entry.name.isdigit():
+        continue
+
+      pid = int(entry.name)
+      process = self.processes.get(pid)
+
+      if process is None:
+        process = self.processes[pid] = Process(pid)
+
+      process.seen = self.tick
+
+    for pid, process in list(self.processes.items()):
+      if process.seen != self.tick or not self.sample(process, elapsed):
+        self.fds -= process.close()
+        del self.processes[pid]
+
+  # Returns the n processes with the highest value of the given attribute
+  def top (self, n, attr):
+    return heapq.nlargest(n, self.processes.values(), key=lambda process: getattr(process, attr))
+
+  # Closes every open file
+  def close (self):
+    for process in self.processes.values():
+      self.fds -= process.close()
+
+    self.processes = {}
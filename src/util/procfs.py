@@ -0,0 +1,176 @@
+# A module exporting readers of proc and sys files kept open across reads
+
+import os
+
+class File:
+  # Opens the file once, re-reading it from offset zero on every read
+  def __init__ (self, path, size=4096):
+    self.path = path
+    self.fd = os.open(path, os.O_RDONLY)
+    self.buffer = bytearray(size)
+
+  # Reads the whole file into the reusable buffer, growing it if needed, seq
+  # files hand out about a page per read however large the buffer is, so read
+  # on at the next offset until the end of the file
+  def read (self):
+    length = 0
+
+    while True:
+      if length == len(self.buffer):
+        self.buffer.extend(bytes(len(self.buffer)))
+
+      count = os.preadv(self.fd, [memoryview(self.buffer)[length:]], length)
+
+      if count == 0:
+        return self.buffer, length
+
+      length += count
+
+  def close (self):
+    if self.fd is not None:
+      os.close(self.fd)
+      self.fd = None
+
+# Reads the whole file once into the given buffer, for files not worth keeping open
+def read_once (path, buffer):
+  fd = os.open(path, os.O_RDONLY)
+
+  try:
+    return buffer, os.preadv(fd, [buffer], 0)
+  finally:
+    os.close(fd)
+
+class Files:
+  # Keeps a file open per path, following any changes in the given paths
+  def __init__ (self):
+    self.files = {}
+
+  # Returns the open files of the given paths, skipping any missing ones
+  def get (self, paths):
+    for path in list(self.files):
+      if path not in paths:
+        self.files.pop(path).close()
+
+    for path in paths:
+      if path not in self.files:
+        try:
+          self.files[path] = File(path, 64)
+        except OSError:
+          continue
+
+    return [self.files[path] for path in paths if path in self.files]
+
+# Returns the integer the file holds, as in sysfs attribute files
+def parse_int (buffer, length):
+  return int(buffer[:length])
+
+# Returns the first value of the uptime file in secs
+def parse_uptime (buffer, length):
+  return float(buffer[:buffer.find(b' ', 0, length)])
+
+# Returns every cpu clock in the cpuinfo file in MHz
+def parse_cpuinfo_clocks (buffer, length):
+  clocks = []
+  start = buffer.find(b'cpu MHz', 0, length)
+
+  while start >= 0:
+    colon = buffer.find(b':', start, length)
+    end = buffer.find(b'\n', colon, length)
+
+    clocks.append(float(buffer[colon + 1:end if end > 0 else length]))
+
+    start = buffer.find(b'cpu MHz', colon, length)
+
+  return clocks
+
+# Returns the aggregated cpu line of the stat file as a list of jiffies
+def parse_cpu_times (buffer, length):
+  end = buffer.find(b'\n', 0, length)
+
+  return [int(value) for value in buffer[5:end].split()]
+
+# Returns the value in bytes of the given field in the meminfo file
+def meminfo_field (buffer, length, field, default=0):
+  start = buffer.find(field, 0, length)
+
+  if start < 0:
+    return default
+
+  end = buffer.find(b' kB', start, length)
+
+  return int(buffer[start + len(field):end]) * 1024
+
+# Returns the total, free, available, buffers and cached memory in bytes
+def parse_meminfo (buffer, length):
+  total = meminfo_field(buffer, length, b'MemTotal:')
+  free = meminfo_field(buffer, length, b'MemFree:')
+  available = meminfo_field(buffer, length, b'MemAvailable:', free)
+  buffers = meminfo_field(buffer, length, b'Buffers:')
+  cached = meminfo_field(buffer, length, b'\nCached:') + meminfo_field(buffer, length, b'SReclaimable:')
+
+  return total, free, available, buffers, cached
+
+# Returns bytes and packets received and sent of every network interface
+def parse_net_dev (buffer, length):
+  counters = {}
+
+  # Skip the first two lines holding the column headers
+  start = buffer.find(b'\n', buffer.find(b'\n', 0, length) + 1, length) + 1
+
+  while start < length:
+    end = buffer.find(b'\n', start, length)
+
+    if end < 0:
+      end = length
+
+    colon = buffer.find(b':', start, end)
+
+    if colon > 0:
+      fields = buffer[colon + 1:end].split()
+      name = bytes(buffer[start:colon]).strip().decode()
+
+      counters[name] = (int(fields[0]), int(fields[1]), int(fields[8]), int(fields[9]))
+
+    start = end + 1
+
+  return counters
+
+# Returns bytes read and written of every device in the diskstats file
+def parse_diskstats (buffer, length):
+  counters = {}
+  start = 0
+
+  while start < length:
+    end = buffer.find(b'\n', start, length)
+
+    if end < 0:
+      end = length
+
+    fields = buffer[start:end].split()
+
+    # Sectors are always 512 bytes long regardless of the device
+    if len(fields) >= 10:
+      counters[fields[2].decode()] = (int(fields[5]) * 512, int(fields[9]) * 512)
+
+    start = end + 1
+
+  return counters
+
+# Returns the cpu ticks, thread count and resident pages of a process stat file
+def parse_process_stat (buffer, length):
+  # Skip the command name, it might contain spaces and parentheses
+  fields = buffer[buffer.rfind(b')', 0, length) + 2:length].split()
+
+  return int(fields[11]) + int(fields[12]), int(fields[17]), int(fields[21])
+
+# Returns the command name of a process stat file
+def parse_process_comm (buffer, length):
+  return bytes(buffer[buffer.find(b'(', 0, length) + 1:buffer.rfind(b')', 0, length)]).decode(errors='replace')
+
+# Returns the bytes a process has read from and written to the storage layer
+def parse_process_io (buffer, length):
+  read = buffer.find(b'read_bytes:', 0, length)
+  write = buffer.find(b'\nwrite_bytes:', 0, length)
+
+  return (int(buffer[read + 11:buffer.find(b'\n', read, length)]),
+    int(buffer[write + 13:buffer.find(b'\n', write + 1, length)]))
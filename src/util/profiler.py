@@ -0,0 +1,95 @@
+# A module exporting a sampling profiler dumping collapsed stacks
+
+import os
+import sys
+import threading
+import time
+
+class Profiler:
+  # Samples every thread's stack at the given rate, dumping each window to the path
+  def __init__ (self, path, rate=100, window=60, logger=None):
+    if rate <= 0 or window <= 0:
+      raise Exception(f"[Errno 22] Invalid profiler rate or window: {rate}, {window}")
+
+    self.path = path
+    self.interval = 1 / rate
+    self.window = window
+    self.logger = logger
+    self.stacks = {}
+    self.labels = {}
+    self.dumps = 0
+    self.event = threading.Event()
+    self.thread = threading.Thread(target=self.run, name='profiler', daemon=True)
+
+  # Returns the collapsed label of the code object, caching it per code
+  def label (self, code):
+    label = self.labels.get(code)
+
+    if label is None:
+      name = os.path.splitext(os.path.basename(code.co_filename))[0]
+      label = self.labels[code] = f'{name}:{code.co_name}:{code.co_firstlineno}'
+
+    return label
+
+  # Aggregates a single sample of every thread but the profiler's own
+  def sample (self):
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    me = threading.get_ident()
+
+    for ident, frame in sys._current_frames().items():
+      if ident == me:
+        continue
+
+      stack = []
+
+      while frame is not None:
+        stack.append(self.label(frame.f_code))
+        frame = frame.f_back
+
+      stack.append(names.get(ident, str(ident)))
+      stack.reverse()
+
+      key = ';'.join(stack)
+      self.stacks[key] = self.stacks.get(key, 0) + 1
+
+  # Writes the aggregated stacks atomically and starts a new window
+  def dump (self):
+    stacks = self.stacks
+    self.stacks = {}
+
+    temp = self.path + '.tmp'
+
+    with open(temp, 'w') as profile_file:
+      for key, count in sorted(stacks.items()):
+        profile_file.write(f'{key} {count}\n')
+
+    os.replace(temp, self.path)
+    self.dumps += 1
+
+    if self.logger:
+      self.logger.debug("profile of %d samples saved to '%s'", sum(stacks.values()), self.path)
+
+  # Samples until stopped, dumping whenever a window has elapsed
+  def run (self):
+    deadline = time.monotonic() + self.window
+
+    while not self.event.wait(self.interval):
+      self.sample()
+
+      if time.monotonic() >= deadline:
+        self.dump()
+        deadline += self.window
+
+    # Dump a partial window only if stopped before any full one
+    if self.dumps == 0 and self.stacks:
+      self.dump()
+
+  def start (self):
+    self.thread.start()
+
+  # Stops sampling waiting for the last dump to be written
+  def stop (self):
+    self.event.set()
+
+    if self.thread.is_alive():
+      self.thread.join()
@@ -0,0 +1,115 @@
+# A module exporting the registry of resolvers discovered in their directory
+
+import ast
+import importlib
+import importlib.util
+import os
+
+class Resolver:
+  # A resolver declared by the module level RESOLVER dict of its module
+  def __init__ (self, name, spec):
+    self.name = name
+    self.key = spec['key']
+    self.tasks = spec.get('tasks', {})
+    self.hooks = spec.get('hooks', {})
+    self.requires = spec.get('requires', [])
+    self.after = spec.get('after', [])
+    self.module = None
+
+  # Imports the resolver's module, deferred until it has been enabled
+  def load (self, package):
+    self.module = importlib.import_module(f'{package}.{self.name}')
+
+    return self.module
+
+  # Returns the resolver's callback with the given name
+  def callback (self, name):
+    return getattr(self.module, name)
+
+  # Calls the hook of the given event with the given args, if any is declared
+  def hook (self, event, *args):
+    if event in self.hooks:
+      self.callback(self.hooks[event])(*args)
+
+# Returns the RESOLVER dict declared in the source file without importing it
+def declaration (path):
+  with open(path) as source_file:
+    tree = ast.parse(source_file.read(), path)
+
+  for node in tree.body:
+    if not isinstance(node, ast.Assign):
+      continue
+
+    for target in node.targets:
+      if isinstance(target, ast.Name) and target.id == 'RESOLVER':
+        return ast.literal_eval(node.value)
+
+  return None
+
+# Returns every resolver declared in the given directory by name
+def scan (directory):
+  resolvers = {}
+
+  for filename in sorted(os.listdir(directory)):
+    name, ext = os.path.splitext(filename)
+
+    if ext != '.py' or name.startswith('_'):
+      continue
+
+    spec = declaration(os.path.join(directory, filename))
+
+    if spec:
+      resolvers[name] = Resolver(name, spec)
+
+  return resolvers
+
+# Returns the enabled resolvers having their requirements met, every one
+# ordered after the resolvers it depends on
+def select (resolvers, enabled, logger=None):
+  selected = {}
+
+  for name, resolver in resolvers.items():
+    if enabled.get(name, True) is False:
+      continue
+
+    missing = [module for module in resolver.requires if importlib.util.find_spec(module) is None]
+
+    if missing:
+      if logger:
+        logger.warn(f"resolver '{name}' is disabled, missing modules: {', '.join(missing)}")
+
+      continue
+
+    selected[name] = resolver
+
+  ordered = []
+  visiting = set()
+
+  # Visit the dependencies depth first, dropping any whose dependency is off
+  def visit (resolver):
+    if resolver in ordered:
+      return True
+
+    if resolver.name in visiting:
+      raise Exception(f"[Errno 22] Circular resolver dependency: '{resolver.name}'")
+
+    visiting.add(resolver.name)
+
+    for name in resolver.after:
+      if name not in selected or not visit(selected[name]):
+        visiting.discard(resolver.name)
+
+        if logger:
+          logger.warn(f"resolver '{resolver.name}' is disabled, it depends on '{name}'")
+
+        return False
+
+    visiting.discard(resolver.name)
+    ordered.append(resolver)
+
+    return True
+
+  for resolver in selected.values():
+    visit(resolver)
+
+  return ordered
@@ -0,0 +1,131 @@
+# A module exporting fork-free resolution of the default network route
+
+import subprocess
+from util import netlink
+
+IPV4_ROUTE_FILE_PATH = '/proc/net/route'
+IPV6_ROUTE_FILE_PATH = '/proc/net/ipv6_route'
+
+# Routing flags and netlink multicast groups as defined in the kernel headers
+RTF_UP = 0x0001
+RTF_REJECT = 0x0200
+RTMGRP_LINK = 0x0001
+RTMGRP_IPV4_ROUTE = 0x0040
+RTMGRP_IPV6_ROUTE = 0x0400
+
+# Returns the interface of the ipv4 default route with the lowest metric
+def parse_ipv4 (content):
+  best = None
+
+  # Columns: iface, destination, gateway, flags, refcnt, use, metric, mask
+  for line in content.splitlines()[1:]:
+    fields = line.split()
+
+    if len(fields) < 8:
+      continue
+
+    flags = int(fields[3], 16)
+
+    if fields[1] != '00000000' or fields[7] != '00000000' or not flags & RTF_UP:
+      continue
+
+    metric = int(fields[6])
+
+    if best is None or metric < best[0]:
+      best = (metric, fields[0])
+
+  return best[1] if best else None
+
+# Returns the interface of the ipv6 default route with the lowest metric
+def parse_ipv6 (content):
+  best = None
+
+  # Columns: destination, prefix, source, prefix, next hop, metric, refcnt, use, flags, iface
+  for line in content.splitlines():
+    fields = line.split()
+
+    if len(fields) < 10:
+      continue
+
+    flags = int(fields[8], 16)
+
+    if int(fields[0], 16) != 0 or fields[1] != '00':
+      continue
+
+    if not flags & RTF_UP or flags & RTF_REJECT:
+      continue
+
+    metric = int(fields[5], 16)
+
+    if best is None or metric < best[0]:
+      best = (metric, fields[9])
+
+  return best[1] if best else None
+
+# Reads the ipv4 and ipv6 proc route tables, ipv6 is missing if disabled
+def read ():
+  with open(IPV4_ROUTE_FILE_PATH) as route_file:
+    ipv4 = route_file.read()
+
+  try:
+    with open(IPV6_ROUTE_FILE_PATH) as route_file:
+      ipv6 = route_file.read()
+  except FileNotFoundError:
+    ipv6 = ''
+
+  return ipv4, ipv6
+
+# Resolves the active interface via iproute2, used as the last resort
+def query ():
+  route = subprocess.run(
+    ['ip', 'route', 'get', '8.8.8.8'],
+    stdout=subprocess.PIPE,
+    stderr=subprocess.PIPE,
+    universal_newlines=True)
+
+  if route.stderr:
+    return None
+
+  return route.stdout.split()[4]
+
+class Routes:
+  # Caches the active interface until the routing table changes
+  def __init__ (self):
+    self.sock = netlink.subscribe(netlink.NETLINK_ROUTE, RTMGRP_LINK | RTMGRP_IPV4_ROUTE | RTMGRP_IPV6_ROUTE)
+    self.stale = True
+    self.contents = None
+    self.name = None
+
+  # Parses the route tables preferring the ipv4 default interface
+  def resolve (self, contents):
+    ipv4, ipv6 = contents
+
+    return parse_ipv4(ipv4) or parse_ipv6(ipv6)
+
+  # Returns the name of the active interface or none if disconnected
+  def interface (self):
+    try:
+      if self.sock:
+        if netlink.drain(self.sock):
+          self.stale = True
+
+        if self.stale:
+          self.name = self.resolve(read())
+      else:
+        # Compare the route tables cheaply in case netlink is not available
+        contents = read()
+
+        if contents != self.contents:
+          self.contents = contents
+          self.name = self.resolve(contents)
+    except OSError:
+      # Fallback to iproute2 in case proc files cannot be read
+      self.name = query()
+
+    self.stale = False
+
+    return self.name
+
+  def close (self):
+    if self.sock:
+      self.sock.close()
@@ -0,0 +1,250 @@
+# A module exporting a timer heap scheduler running periodic tasks
+
+import asyncio
+import collections
+import heapq
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class Task:
+  def __init__ (self, name, interval, callback, priority, blocking):
+    self.name = name
+    self.interval = interval
+    self.callback = callback
+    self.priority = priority
+    self.blocking = blocking
+    self.ticks = 0
+    self.missed = 0
+    self.latency = 0
+    self.paused = False
+
+class Scheduler:
+  def __init__ (self, logger=None):
+    self.logger = logger
+    self.tasks = []
+    self.heap = []
+    self.counter = 0
+    self.origin = time.monotonic()
+    # Up from the start, so a stop arriving before run is never undone
+    self.up = True
+    self.event = threading.Event()
+    self.calls = collections.deque()
+    self.busy = 0
+    self.wakeups = 0
+
+  # Registers a task to run every interval secs, lower priorities run first
+  def every (self, name, interval, callback, priority=0, blocking=False):
+    if interval <= 0:
+      raise Exception(f"[Errno 22] Invalid interval for task '{name}': {interval}")
+
+    task = Task(name, interval, callback, priority, blocking)
+    self.tasks.append(task)
+    self.push(self.origin, task)
+
+    return task
+
+  # Pushes the task into the heap, ordering ties by priority and insertion
+  def push (self, deadline, task):
+    self.counter += 1
+    heapq.heappush(self.heap, (deadline, task.priority, self.counter, task))
+
+  # Changes the interval of the named task, must run on the scheduler's thread
+  def reschedule (self, name, interval):
+    if interval <= 0:
+      raise Exception(f"[Errno 22] Invalid interval for task '{name}': {interval}")
+
+    for task in self.tasks:
+      if task.name == name and task.interval != interval:
+        task.interval = interval
+
+        # Restart the tick count so no ticks are taken as missed
+        task.ticks = 0
+
+        # A paused task takes the new interval once resumed
+        if task.paused:
+          continue
+
+        self.remove(task)
+        self.push(self.next_deadline(task, time.monotonic()), task)
+
+  # Removes the task from the heap
+  def remove (self, task):
+    self.heap = [entry for entry in self.heap if entry[3] is not task]
+    heapq.heapify(self.heap)
+
+  # Stops running the named task until resumed, must run on the scheduler's thread
+  def pause (self, name):
+    for task in self.tasks:
+      if task.name == name and not task.paused:
+        task.paused = True
+        self.remove(task)
+
+  # Runs the named paused task right away and then on its interval again
+  def resume (self, name):
+    for task in self.tasks:
+      if task.name == name and task.paused:
+        task.paused = False
+        task.ticks = 0
+        self.push(time.monotonic(), task)
+
+  # Queues a callback to run between tasks, safe from any thread or signal handler
+  def call_soon (self, callback):
+    self.calls.append(callback)
+    self.wake()
+
+  # Wakes the scheduler up from any pending wait
+  def wake (self):
+    self.event.set()
+
+  # Runs any queued callbacks, catching any errors like tasks
+  def run_calls (self):
+    while self.calls:
+      callback = self.calls.popleft()
+
+      try:
+        callback()
+      except Exception as exc:
+        if self.logger:
+          self.logger.trace(exc)
+
+  # Returns the next deadline aligned to the interval grid of the origin
+  def next_deadline (self, task, now):
+    ticks = math.floor((now - self.origin) / task.interval) + 1
+
+    # Count any ticks skipped because of an overrun
+    if task.ticks > 0 and ticks > task.ticks + 1:
+      task.missed += ticks - task.ticks - 1
+
+    task.ticks = ticks
+
+    return self.origin + ticks * task.interval
+
+  # Runs the due task, catching any errors to keep the schedule going
+  def execute (self, task):
+    start = time.perf_counter()
+
+    try:
+      task.callback()
+    except Exception as exc:
+      if self.logger:
+        self.logger.trace(exc)
+
+    # Account how long the task has run, even if it has failed
+    task.latency = time.perf_counter() - start
+    self.busy += task.latency
+
+  # Blocks running the tasks in the order of their deadlines until stopped,
+  # returning right away if it has been already stopped
+  def run (self):
+    while self.up and self.heap:
+      # Clear before running the calls, so calls queued by the tasks
+      # themselves do not wake the next wait up for nothing
+      self.event.clear()
+      self.run_calls()
+
+      deadline, priority, counter, task = self.heap[0]
+
+      delay = deadline - time.monotonic()
+
+      if delay > 0:
+        self.event.wait(delay)
+        self.wakeups += 1
+        continue
+
+      heapq.heappop(self.heap)
+
+      self.execute(task)
+
+      self.push(self.next_deadline(task, time.monotonic()), task)
+
+  # Stops the scheduler waking it up from any pending wait
+  def stop (self):
+    self.up = False
+    self.wake()
+
+class AsyncScheduler(Scheduler):
+  # Runs the tasks on an event loop, offloading blocking ones to a bounded pool
+  def __init__ (self, logger=None, workers=2):
+    super().__init__(logger)
+    self.workers = workers
+    self.loop = None
+    self.main = None
+    self.wakeup = None
+
+  # Runs the task inline or in the executor in case it is blocking
+  async def dispatch (self, executor, task):
+    if task.blocking:
+      await self.loop.run_in_executor(executor, self.execute, task)
+    else:
+      self.execute(task)
+
+  # Runs every due task, waiting for lower priorities before higher ones
+  async def schedule (self):
+    # Create the event on the running loop, older pythons bind it to the default one
+    self.wakeup = asyncio.Event()
+
+    executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='resolver')
+
+    try:
+      while self.up and self.heap:
+        self.wakeup.clear()
+        self.run_calls()
+
+        delay = self.heap[0][0] - time.monotonic()
+
+        if delay > 0:
+          try:
+            await asyncio.wait_for(self.wakeup.wait(), delay)
+          except asyncio.TimeoutError:
+            pass
+
+          self.wakeups += 1
+          continue
+
+        now = time.monotonic()
+        due = []
+
+        while self.heap and self.heap[0][0] <= now:
+          due.append(heapq.heappop(self.heap)[3])
+
+        for priority in sorted(set(task.priority for task in due)):
+          group = [task for task in due if task.priority == priority]
+          await asyncio.gather(*(self.dispatch(executor, task) for task in group))
+
+        now = time.monotonic()
+
+        for task in due:
+          self.push(self.next_deadline(task, now), task)
+    except asyncio.CancelledError:
+      pass
+    finally:
+      # Let any offloaded task complete before returning
+      executor.shutdown(wait=True)
+
+  # Blocks running the event loop until stopped, returning right away if
+  # it has been already stopped
+  def run (self):
+    if not self.up:
+      return
+
+    self.loop = asyncio.new_event_loop()
+
+    try:
+      self.main = self.loop.create_task(self.schedule())
+      self.loop.run_until_complete(self.main)
+    finally:
+      self.loop.close()
+
+  # Wakes the event loop up from any pending wait, safe from any thread
+  def wake (self):
+    if self.loop and self.wakeup and not self.loop.is_closed():
+      self.loop.call_soon_threadsafe(self.wakeup.set)
+
+  # Stops the scheduler cancelling the main coroutine, safe from any thread
+  def stop (self):
+    self.up = False
+
+    if self.loop and self.main and not self.loop.is_closed():
+      self.loop.call_soon_threadsafe(self.main.cancel)
@@ -0,0 +1,36 @@
+# A module exporting double buffered snapshots shared between threads
+
+import threading
+import time
+
+class Snapshot:
+  # An immutable sample with its sequence number and timestamp
+  __slots__ = ('seq', 'time', 'data')
+
+  def __init__ (self, seq, time, data):
+    self.seq = seq
+    self.time = time
+    self.data = data
+
+class Buffer:
+  # Holds the latest snapshot, readers take it with a single reference read
+  def __init__ (self, data):
+    self.lock = threading.Lock()
+    self.current = Snapshot(0, 0, data)
+
+  # Publishes the given data, which must never be mutated afterwards
+  def write (self, data):
+    with self.lock:
+      self.current = Snapshot(self.current.seq + 1, time.time(), data)
+
+  # Publishes a copy of the current data merging the values into the given key
+  def update (self, key, values):
+    with self.lock:
+      data = dict(self.current.data)
+
+      merged = dict(data.get(key) or {})
+      merged.update(values)
+
+      data[key] = merged
+
+      self.current = Snapshot(self.current.seq + 1, time.time(), data)
@@ -3,8 +3,12 @@
 import sys
 import os
 import time
+import select
 import subprocess
 
+# The env variable holding the path of the readiness handshake fifo
+READY_ENV = 'READY_FIFO_PATH'
+
 # Aborts the process in fatal error
 def exit (errcode):
   sys.exit(errcode)
@@ -13,18 +17,42 @@ def exit (errcode):
 def isUp (pid):
   return os.path.exists('/proc/' + str(pid))
 
-# Spawns a new process given the command
-def spawn (command, log_file_path, env_var=None):
-  with open(log_file_path, 'a') as log_file:
-    process = subprocess.Popen(
-      command.split(),
-      stdout=log_file,
-      stderr=log_file,
-      universal_newlines=True,
-      env=env_var)
+# Moves the log file aside to a single backup once it has grown over max_bytes
+def rotate (log_file_path, max_bytes):
+  try:
+    if max_bytes > 0 and os.path.getsize(log_file_path) > max_bytes:
+      os.replace(log_file_path, log_file_path + '.1')
+  except OSError:
+    pass
+
+# Spawns a new process given the command, waiting for its readiness signal,
+# the output of which is appended to the log file rotated over max_bytes
+def spawn (command, log_file_path, env_var=None, ready_path=None, timeout=10, max_bytes=0):
+  fifo = None
+
+  rotate(log_file_path, max_bytes)
+
+  if ready_path:
+    fifo = open_ready(ready_path)
 
-  # Give time to the process to be spawn
-  time.sleep(2)
+    env_var = dict(env_var or os.environ)
+    env_var[READY_ENV] = ready_path
+
+  try:
+    with open(log_file_path, 'a') as log_file:
+      process = subprocess.Popen(
+        command.split(),
+        stdout=log_file,
+        stderr=log_file,
+        universal_newlines=True,
+        env=env_var)
+
+    if fifo is not None:
+      wait_ready(process, fifo, timeout)
+  finally:
+    if fifo is not None:
+      os.close(fifo)
+      os.remove(ready_path)
 
   # Check if the process has failed to be spawn
   code = process.poll()
@@ -34,6 +62,64 @@ def spawn (command, log_file_path, env_var=None):
 
   return process.pid
 
+# Creates the handshake fifo, opened read-write so no end of file shows up
+# before the spawned process gets to open it for writing
+def open_ready (path):
+  if os.path.exists(path):
+    os.remove(path)
+
+  os.mkfifo(path, 0o600)
+
+  return os.open(path, os.O_RDWR | os.O_NONBLOCK)
+
+# Waits until the process signals through the fifo, exits or times out
+def wait_ready (process, fifo, timeout):
+  deadline = time.monotonic() + timeout
+
+  while time.monotonic() < deadline:
+    readable = select.select([fifo], [], [], 0.05)[0]
+
+    if readable and os.read(fifo, 64):
+      return True
+
+    if process.poll() != None:
+      return False
+
+  return False
+
+# Signals the spawning process through the handshake fifo, if there is any
+def notify_ready ():
+  path = os.environ.pop(READY_ENV, None)
+
+  if not path:
+    return
+
+  try:
+    fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+  except OSError:
+    # Nobody is waiting anymore
+    return
+
+  try:
+    os.write(fd, b'ready\n')
+  finally:
+    os.close(fd)
+
+# Waits until the process with the given pid has exited or times out
+def wait_exit (pid, timeout=5):
+  deadline = time.monotonic() + timeout
+
+  while isUp(pid) and time.monotonic() < deadline:
+    # Reap the process in case it is a child of this one
+    try:
+      os.waitpid(int(pid), os.WNOHANG)
+    except ChildProcessError:
+      pass
+
+    time.sleep(0.01)
+
+  return not isUp(pid)
+
 # Kills the process identified by the given pid
 def kill (pid, log_file_path):
   if not isUp(pid):
@@ -49,6 +135,9 @@ def kill (pid, log_file_path):
   if process.returncode != 0:
     raise Exception(f"[Errno 3] Failed to kill process: '{str(pid)}'")
 
+  # Let the process flush and release its files before any respawn
+  wait_exit(pid)
+
   return True
 
 # Writes the given data to the file with the given path
@@ -0,0 +1,69 @@
+# A module exporting the self telemetry of the resolver process
+
+import os
+from util import procfs
+
+TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+class Telemetry:
+  # Measures the process and the tasks of the given scheduler
+  def __init__ (self, scheduler):
+    self.scheduler = scheduler
+    self.stat = procfs.File('/proc/self/stat', 1024)
+    self.time = None
+    self.ticks = 0
+    self.busy = 0
+    self.bytes = 0
+    self.total = 0
+
+  # Accounts the size of a published payload
+  def sent (self, size):
+    self.bytes = size
+    self.total += size
+
+  # Returns the telemetry of the cycle since the last sample
+  def sample (self, now):
+    ticks, threads, pages = procfs.parse_process_stat(*self.stat.read())
+
+    # Cycle duration is the time spent running any task since the last sample
+    busy = self.scheduler.busy
+    cycle = busy - self.busy
+
+    cpu = 0
+
+    if self.time is not None and now > self.time:
+      cpu = (ticks - self.ticks) / TICKS / (now - self.time) * 100
+
+    self.time = now
+    self.ticks = ticks
+    self.busy = busy
+
+    tasks = {}
+    missed = 0
+
+    for task in self.scheduler.tasks:
+      tasks[task.name] = {
+        'latency': round(task.latency * 1000, 3),
+        'missed': task.missed,
+        'ticks': task.ticks
+      }
+
+      missed += task.missed
+
+    return {
+      'pid': os.getpid(),
+      'cycle': round(cycle * 1000, 3),
+      'cpu': round(cpu, 2),
+      'cpu_time': round(ticks / TICKS, 2),
+      'rss': pages * PAGE_SIZE,
+      'threads': threads,
+      'bytes': self.bytes,
+      'bytes_total': self.total,
+      'missed': missed,
+      'wakeups': self.scheduler.wakeups,
+      'tasks': tasks
+    }
+
+  def close (self):
+    self.stat.close()
@@ -0,0 +1,211 @@
+# A module exporting a cached index of the hardware files to be monitored
+
+import os
+import re
+import select
+from util import netlink
+
+MOUNTINFO_FILE_PATH = '/proc/self/mountinfo'
+HWMON_DIR = '/sys/class/hwmon'
+BLOCK_DIR = '/sys/block'
+CPU_DIR = '/sys/devices/system/cpu'
+NVIDIA_GPUS_DIR = '/proc/driver/nvidia/gpus'
+
+# Returns the given mountpoints found in the mountinfo content, or every
+# mountpoint of a block device if none are given, once per device
+def parse_mountpoints (content, mountpoints=None):
+  found = []
+  devices = set()
+
+  # The fifth column of every line is the mountpoint, the source follows the separator
+  for line in content.splitlines():
+    fields = line.split()
+
+    if len(fields) < 5 or fields[4] in found:
+      continue
+
+    if mountpoints is not None:
+      if fields[4] in mountpoints:
+        found.append(fields[4])
+
+      continue
+
+    # Skip loop devices like snaps, bind mounts and subvolumes of a found device
+    source = fields[fields.index('-') + 2] if '-' in fields else ''
+
+    if source.startswith('/dev/') and not source.startswith('/dev/loop') and fields[2] not in devices:
+      devices.add(fields[2])
+      found.append(fields[4])
+
+  return found
+
+# Returns the input files of the hwmon sensors matching the name and label
+def find_thermals (name, label):
+  inputs = []
+
+  if not os.path.exists(HWMON_DIR):
+    return inputs
+
+  for hwmon in sorted(os.listdir(HWMON_DIR)):
+    path = os.path.join(HWMON_DIR, hwmon)
+
+    try:
+      with open(path + '/name') as name_file:
+        if name_file.read().strip() != name:
+          continue
+
+      for entry in sorted(os.listdir(path)):
+        if not entry.startswith('temp') or not entry.endswith('_label'):
+          continue
+
+        with open(os.path.join(path, entry)) as label_file:
+          if label_file.read().strip() == label:
+            inputs.append(os.path.join(path, entry.replace('_label', '_input')))
+    except OSError:
+      continue
+
+  return inputs
+
+# Returns the current clock files of every cpu having cpufreq support
+def find_clocks ():
+  clocks = []
+
+  # Order the cpus by number instead of by name
+  entries = [entry for entry in list_dir(CPU_DIR) if re.match(r'^cpu\d+$', entry)]
+
+  for entry in sorted(entries, key=lambda entry: int(entry[3:])):
+    path = os.path.join(CPU_DIR, entry, 'cpufreq/scaling_cur_freq')
+
+    if os.path.exists(path):
+      clocks.append(path)
+
+  return clocks
+
+# Returns the physical block devices, skipping loop, ram and device mapper ones
+def find_devices ():
+  return [name for name in list_dir(BLOCK_DIR) if os.path.exists(os.path.join(BLOCK_DIR, name, 'device'))]
+
+# Returns the sorted entries of the given dir or empty if missing
+def list_dir (path):
+  try:
+    return sorted(os.listdir(path))
+  except OSError:
+    return []
+
+# Returns the number of graphics cards the nvidia driver has registered
+def count_gpus ():
+  try:
+    return len(os.listdir(NVIDIA_GPUS_DIR))
+  except OSError:
+    return 0
+
+class Topology:
+  # Discovers the files to read once, watching for changes in the hardware
+  def __init__ (self, mountpoints=None, sensor=('k10temp', 'Tdie')):
+    self.wanted = mountpoints
+    self.sensor = sensor
+
+    # Mount table changes are signaled as a priority event on mountinfo
+    self.mountinfo = open(MOUNTINFO_FILE_PATH)
+    self.poller = select.poll()
+    self.poller.register(self.mountinfo, select.POLLPRI | select.POLLERR)
+
+    # Device changes are signaled as kernel uevents, listing sysfs otherwise
+    self.sock = netlink.subscribe(netlink.NETLINK_KOBJECT_UEVENT, 1)
+    self.listings = {}
+
+    self.mounts = []
+    self.thermals = []
+    self.clocks = []
+    self.devices = []
+    self.gpus = 0
+
+    self.discover_mounts()
+    self.discover_thermals()
+    self.discover_clocks()
+    self.discover_devices()
+    self.discover_gpus()
+
+  def discover_mounts (self):
+    self.mountinfo.seek(0)
+    self.mounts = parse_mountpoints(self.mountinfo.read(), self.wanted)
+
+  def discover_thermals (self):
+    self.thermals = find_thermals(*self.sensor)
+
+  def discover_clocks (self):
+    self.clocks = find_clocks()
+
+  def discover_devices (self):
+    self.devices = find_devices()
+
+  def discover_gpus (self):
+    self.gpus = count_gpus()
+
+  # Returns the subsystems having any device been added or removed
+  def changes (self):
+    changed = set()
+
+    if self.sock:
+      for message in netlink.drain(self.sock):
+        if message is None or b'SUBSYSTEM=hwmon' in message:
+          changed.add('hwmon')
+
+        if message is None or b'SUBSYSTEM=block' in message:
+          changed.add('block')
+
+      return changed
+
+    for subsystem, path in (('hwmon', HWMON_DIR), ('block', BLOCK_DIR)):
+      listing = list_dir(path)
+
+      if listing != self.listings.get(subsystem):
+        self.listings[subsystem] = listing
+        changed.add(subsystem)
+
+    return changed
+
+  # Rediscovers the parts of the index affected by any device changes
+  def refresh (self):
+    changed = self.changes()
+
+    if 'hwmon' in changed:
+      self.discover_thermals()
+
+    if 'block' in changed:
+      self.discover_devices()
+
+  # Returns the mountpoints to read, rediscovered on mount table changes
+  def mountpoints (self):
+    if self.poller.poll(0):
+      self.discover_mounts()
+
+    return self.mounts
+
+  # Returns the sensor input files, rediscovered on hwmon changes
+  def thermal_inputs (self):
+    self.refresh()
+
+    return self.thermals
+
+  # Returns the cpu clock files, cpus are considered fixed while running
+  def clock_inputs (self):
+    return self.clocks
+
+  # Returns the whole block devices, rediscovered on block changes
+  def block_devices (self):
+    self.refresh()
+
+    return self.devices
+
+  # Returns the number of graphics cards, rediscovered on every call
+  def gpu_count (self):
+    self.discover_gpus()
+
+    return self.gpus
+
+  def close (self):
+    self.mountinfo.close()
+
+    if self.sock:
+      self.sock.close()